@@ -1,82 +1,593 @@
 #!/usr/bin/env python3
-from flask import Flask, render_template_string, request
-from flask_socketio import SocketIO, emit, join_room, leave_room
+import argparse
+import os
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Cranium Charades server')
+    parser.add_argument('--host', default=os.environ.get('CRANIUM_HOST', '127.0.0.1'),
+                        help='interface to bind (env CRANIUM_HOST, default 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('CRANIUM_PORT', 8004)),
+                        help='port to listen on (env CRANIUM_PORT, default 8004)')
+    parser.add_argument('--async-mode', choices=['threading', 'gevent'],
+                        default=os.environ.get('CRANIUM_ASYNC_MODE', 'threading'),
+                        help='threading for local development, gevent for production '
+                             '(env CRANIUM_ASYNC_MODE, default threading)')
+    parser.add_argument('--debug', action=argparse.BooleanOptionalAction,
+                        default=None if 'CRANIUM_DEBUG' not in os.environ else os.environ['CRANIUM_DEBUG'] == '1',
+                        help='reloader and debugger (env CRANIUM_DEBUG=1/0, default on for threading only)')
+    args = parser.parse_args(argv)
+    if args.debug is None:
+        args.debug = args.async_mode == 'threading'
+    return args
+
+ARGS = parse_args() if __name__ == '__main__' else parse_args([])
+
+if ARGS.async_mode == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+
+from flask import Flask, Response, jsonify, request
+from flask_socketio import ConnectionRefusedError, SocketIO
+from werkzeug.middleware.proxy_fix import ProxyFix
+import functools
+import heapq
+import hmac
 import json
+import logging
 import random
+import signal
+import sys
+import threading
 import time
+from array import array
+from collections import deque
 from datetime import datetime, timedelta
 import uuid
 
-app = Flask(__name__)
+import assets
+import eventlog
+import metrics
+import native
+import profiler
+import ratelimit
+import wire
+import wordstats
+
+app = Flask(__name__, static_folder=None)
 app.config['SECRET_KEY'] = 'cranium-charades-secret-key'
-socketio = SocketIO(app, cors_allowed_origins="*")
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ARGS.async_mode, json=metrics.MeteredJSON)
+
+# Behind Caddy every socket comes from 127.0.0.1; trust that many X-Forwarded-For
+# hops so request.remote_addr, and with it the per-IP rate limits, see the client.
+PROXY_HOPS = int(os.environ.get('CRANIUM_PROXY_HOPS', 0))
+if PROXY_HOPS:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_HOPS)
+
+def time_handler(event, handler):
+    latency = metrics.histogram_for(event)
+
+    @functools.wraps(handler)
+    def timed_handler(*args):
+        start = time.perf_counter()
+        try:
+            return handler(*args)
+        finally:
+            latency.observe(time.perf_counter() - start)
+    return timed_handler
+
+def on_event(event, timed=True):
+    def decorator(handler):
+        run = time_handler(event, handler) if timed else handler
+
+        @functools.wraps(handler)
+        def limited_handler(*args):
+            if not rate_limiter.allow(event, request.sid, request.remote_addr):
+                return
+            return run(*args)
+
+        return socketio.on(event)(limited_handler)
+    return decorator
+
+def on_game_event(event):
+    # The handler runs inside the game's mailbox as handler(sid, data), possibly
+    # on another connection's thread, so it addresses its replies explicitly
+    # instead of relying on flask_socketio.emit and the request context. It is
+    # timed where the mailbox runs it; the dispatch around it may only queue it,
+    # or drain other handlers' events along with its own.
+    def decorator(handler):
+        run = time_handler(event, handler)
+
+        @on_event(event, timed=False)
+        def dispatcher(data):
+            dispatch(data['game_id'], run, request.sid, data)
+        return handler
+    return decorator
 
 with open('words.json', 'r') as f:
     WORDS = json.load(f)
 
+# Rooms refer to words by their index in WORDS[category]. Category names are
+# looked up here so every room shares one string per category.
+CATEGORIES = {category: category for category in WORDS}
+WORD_INDEX = {category: {word: index for index, word in enumerate(words)} for category, words in WORDS.items()}
+# 'normal' draws from the game's shuffled deck; 'easy' and 'hard' lean on the
+# word stats towards words that are usually guessed quickly or usually skipped.
+DIFFICULTIES = {difficulty: difficulty for difficulty in ('easy', 'normal', 'hard')}
+
+SOCKETIO_CLIENT_CDN = 'https://cdn.socket.io/4.8.1/socket.io.min.js'
+static_assets = assets.StaticAssets('static', fallbacks={'vendor/socket.io.min.js': SOCKETIO_CLIENT_CDN})
+
+def render_page(template, prefix):
+    html = template.render(asset=lambda name: static_assets.url(name, prefix))
+    return assets.Asset(html.encode(), assets.CONTENT_TYPES['.html'], assets.REVALIDATE)
+
+# Asset URLs in the page are relative so they resolve under whatever prefix Caddy
+# strips; '/' sits at the root and '/game/<game_id>' one level below it.
+page_template = app.jinja_env.get_template('index.html')
+pages = {'index': render_page(page_template, 'static/'), 'game': render_page(page_template, '../static/')}
+
 WORD_LISTS = {
     'running': ['running', 'walking', 'jumping', 'flying', 'swimming', 'climbing', 'dancing', 'singing'],
     'colors': ['red', 'blue', 'green', 'yellow', 'purple', 'orange', 'pink', 'brown'],
     'animals': ['cat', 'dog', 'bird', 'fish', 'elephant', 'lion', 'tiger', 'bear']
 }
 
+ADMIN_TOKEN = os.environ.get('CRANIUM_ADMIN_TOKEN')
+GAME_IDLE_TTL = int(os.environ.get('CRANIUM_GAME_IDLE_TTL', 3600))
+GAME_REAP_INTERVAL = int(os.environ.get('CRANIUM_GAME_REAP_INTERVAL', 900))
+ROUND_TIMER_RESOLUTION = 0.1
+COALESCE_INTERVAL = float(os.environ.get('CRANIUM_COALESCE_INTERVAL', 0))
+MAX_GAMES = int(os.environ.get('CRANIUM_MAX_GAMES', 0))
+MAX_PLAYERS_PER_GAME = int(os.environ.get('CRANIUM_MAX_PLAYERS_PER_GAME', 0))
+MAX_CONNECTIONS = int(os.environ.get('CRANIUM_MAX_CONNECTIONS', 0))
+SHED_LAG = float(os.environ.get('CRANIUM_SHED_LAG', 0.25))
+LAG_SAMPLE_INTERVAL = 0.1
+REPLAY_BUFFER = int(os.environ.get('CRANIUM_REPLAY_BUFFER', 64))
+# Versions only mean something within one server process; a client resuming
+# across a restart gets a snapshot.
+SERVER_EPOCH = uuid.uuid4().hex[:12]
+SPECTATOR_INTERVAL = float(os.environ.get('CRANIUM_SPECTATOR_INTERVAL', 1.0))
+SPECTATOR_TOP_N = int(os.environ.get('CRANIUM_SPECTATOR_TOP_N', 10))
+SNAPSHOT_PATH = os.environ.get('CRANIUM_SNAPSHOT_PATH', 'games-snapshot.jsonl')
+SNAPSHOT_INTERVAL = float(os.environ.get('CRANIUM_SNAPSHOT_INTERVAL', 5))
+SNAPSHOT_FORMAT = 3
+EVENT_LOG_DIR = os.environ.get('CRANIUM_EVENT_LOG_DIR', 'event-log')
+EVENT_LOG_FSYNC_INTERVAL = float(os.environ.get('CRANIUM_EVENT_LOG_FSYNC_INTERVAL', 1.0))
+WORD_STATS_PATH = os.environ.get('CRANIUM_WORD_STATS_PATH', 'word-stats.json')
+WORD_STATS_INTERVAL = float(os.environ.get('CRANIUM_WORD_STATS_INTERVAL', 30))
+
+# (tokens per second, burst) per socket and per client IP. One IP can be a whole
+# office or party behind NAT, so its buckets are roomy; they are there to stop a
+# script, not a crowd.
+RATE_LIMITS = ratelimit.parse_limits({
+    'create_game': {'sid': (0.2, 3), 'ip': (1, 20)},
+    'join_game': {'sid': (1, 5), 'ip': (20, 200)},
+    'start_round': {'sid': (1, 5), 'ip': (10, 50)},
+    'select_category': {'sid': (2, 5), 'ip': (20, 50)},
+    'start_timer': {'sid': (1, 5), 'ip': (10, 50)},
+    'correct_guess': {'sid': (4, 8), 'ip': (40, 100)},
+    'skip_word': {'sid': (4, 8), 'ip': (40, 100)},
+    'rename_player': {'sid': (0.5, 3), 'ip': (5, 20)},
+    'end_round': {'sid': (1, 5), 'ip': (10, 50)},
+    'sync_state': {'sid': (2, 10), 'ip': (20, 200)},
+    'watch_game': {'sid': (1, 5), 'ip': (20, 500)},
+}, os.environ.get('CRANIUM_RATE_LIMITS', ''))
+
 games = {}
+sid_index = {}
+reap_queue = []
+round_timers = []
+reaper_stats = {'sweeps': 0, 'evicted_games': 0, 'evicted_players': 0}
+load_stats = {'loop_lag': 0.0, 'mailbox_wait': 0.0, 'lag': 0.0}
+mailboxes = {}
+binary_sids = set()
+rate_limiter = ratelimit.RateLimiter(RATE_LIMITS)
+pending_updates = {}
+spectated = {}
+snapshot_lines = {}
+snapshot_stats = {'written': 0, 'encoded_games': 0, 'restored_games': 0, 'unwritten': 0}
+snapshot_file_lock = native.allocate_lock()
+word_stats = wordstats.WordStats(WORDS, WORD_STATS_PATH, WORD_STATS_INTERVAL)
+event_log = None
+
+CODE_ADJECTIVES = ['happy', 'sunny', 'bright', 'clever', 'swift', 'gentle', 'brave', 'kind',
+                   'wise', 'calm', 'bold', 'cool', 'lucky', 'merry', 'quiet', 'rapid',
+                   'sharp', 'smart', 'wild', 'young', 'zesty', 'eager', 'fancy', 'grand',
+                   'jolly', 'lively', 'mighty', 'noble', 'proud', 'royal', 'super', 'vital',
+                   'warm', 'zippy', 'sleek', 'slick', 'snappy', 'speedy', 'spry', 'sturdy']
+
+CODE_COLORS = ['red', 'blue', 'green', 'yellow', 'purple', 'orange', 'pink', 'cyan',
+               'amber', 'jade', 'ruby', 'coral', 'mint', 'lime', 'navy', 'teal',
+               'gold', 'silver', 'bronze', 'pearl', 'ivory', 'azure', 'crimson', 'indigo',
+               'violet', 'magenta', 'maroon', 'olive', 'plum', 'tan', 'beige', 'khaki']
+
+CODE_NOUNS = ['fox', 'bear', 'wolf', 'deer', 'hawk', 'eagle', 'lion', 'tiger',
+              'panda', 'koala', 'otter', 'seal', 'whale', 'shark', 'dolphin', 'penguin',
+              'rabbit', 'squirrel', 'beaver', 'moose', 'elk', 'bison', 'zebra', 'giraffe',
+              'monkey', 'gorilla', 'leopard', 'cheetah', 'panther', 'jaguar', 'lynx', 'cougar',
+              'falcon', 'raven', 'crow', 'sparrow', 'robin', 'finch', 'wren', 'jay']
+
+class GameCodesExhausted(Exception):
+    pass
+
+class GameCodes:
+    # Code n is CODE_ADJECTIVES[n // (colors * nouns)], CODE_COLORS[n // nouns % colors]
+    # and CODE_NOUNS[n % nouns]. free holds every unused n in no particular order and
+    # slot[n] is n's position in it, so allocating a random free code, reserving a
+    # given one and releasing one are each a swap with the end of the array, O(1)
+    # at any occupancy.
+    __slots__ = ('free', 'slot', 'index', 'lock')
+
+    def __init__(self):
+        size = len(CODE_ADJECTIVES) * len(CODE_COLORS) * len(CODE_NOUNS)
+        self.free = array('I', range(size))
+        self.slot = array('I', range(size))
+        self.index = [{word: i for i, word in enumerate(words)} for words in (CODE_ADJECTIVES, CODE_COLORS, CODE_NOUNS)]
+        self.lock = threading.Lock()
+
+    def code(self, n):
+        rest, noun = divmod(n, len(CODE_NOUNS))
+        adjective, color = divmod(rest, len(CODE_COLORS))
+        return f"{CODE_ADJECTIVES[adjective]}-{CODE_COLORS[color]}-{CODE_NOUNS[noun]}"
+
+    def number(self, code):
+        parts = code.split('-')
+        if len(parts) != 3:
+            return None
+        adjective, color, noun = (index.get(part) for index, part in zip(self.index, parts))
+        if adjective is None or color is None or noun is None:
+            return None
+        return (adjective * len(CODE_COLORS) + color) * len(CODE_NOUNS) + noun
+
+    def is_free(self, n):
+        position = self.slot[n]
+        return position < len(self.free) and self.free[position] == n
+
+    def _take(self, n):
+        position = self.slot[n]
+        last = self.free.pop()
+        if last != n:
+            self.free[position] = last
+            self.slot[last] = position
+
+    def allocate(self):
+        with self.lock:
+            if not self.free:
+                raise GameCodesExhausted()
+            n = self.free[random.randrange(len(self.free))]
+            self._take(n)
+        return self.code(n)
+
+    def reserve(self, code):
+        n = self.number(code)
+        with self.lock:
+            if n is not None and self.is_free(n):
+                self._take(n)
+
+    def release(self, code):
+        n = self.number(code)
+        with self.lock:
+            if n is not None and not self.is_free(n):
+                self.slot[n] = len(self.free)
+                self.free.append(n)
+
+    def __len__(self):
+        return len(self.free)
+
+game_codes = GameCodes()
 
 def generate_game_code():
-    adjectives = ['happy', 'sunny', 'bright', 'clever', 'swift', 'gentle', 'brave', 'kind',
-                  'wise', 'calm', 'bold', 'cool', 'lucky', 'merry', 'quiet', 'rapid',
-                  'sharp', 'smart', 'wild', 'young', 'zesty', 'eager', 'fancy', 'grand',
-                  'jolly', 'lively', 'mighty', 'noble', 'proud', 'royal', 'super', 'vital',
-                  'warm', 'zippy', 'sleek', 'slick', 'snappy', 'speedy', 'spry', 'sturdy']
-
-    colors = ['red', 'blue', 'green', 'yellow', 'purple', 'orange', 'pink', 'cyan',
-              'amber', 'jade', 'ruby', 'coral', 'mint', 'lime', 'navy', 'teal',
-              'gold', 'silver', 'bronze', 'pearl', 'ivory', 'azure', 'crimson', 'indigo',
-              'violet', 'magenta', 'maroon', 'olive', 'plum', 'tan', 'beige', 'khaki']
-
-    nouns = ['fox', 'bear', 'wolf', 'deer', 'hawk', 'eagle', 'lion', 'tiger',
-             'panda', 'koala', 'otter', 'seal', 'whale', 'shark', 'dolphin', 'penguin',
-             'rabbit', 'squirrel', 'beaver', 'moose', 'elk', 'bison', 'zebra', 'giraffe',
-             'monkey', 'gorilla', 'leopard', 'cheetah', 'panther', 'jaguar', 'lynx', 'cougar',
-             'falcon', 'raven', 'crow', 'sparrow', 'robin', 'finch', 'wren', 'jay']
-
-    while True:
-        code = f"{random.choice(adjectives)}-{random.choice(colors)}-{random.choice(nouns)}"
-        if code not in games:
-            return code
+    return game_codes.allocate()
+
+class Player:
+    __slots__ = ('name', 'score', 'skips', 'connected', 'sid')
+
+    def __init__(self, name, score=0, skips=0, connected=False, sid=None):
+        self.name = name
+        self.score = score
+        self.skips = skips
+        self.connected = connected
+        self.sid = sid
+
+class Game:
+    # word is an index into WORDS[current_category] and words_used is a bitmap of
+    # those indexes (see wordstats.is_used) with used_count bits set, created on
+    # the round's first word, so a round in progress allocates no per-room
+    # strings and marking or testing a word is O(1) whatever the category size.
+    # decks is created on the first draw; idle lobbies never need one. names maps
+    # each player name to its player id so rejoining by name is O(1). replay holds
+    # the last REPLAY_BUFFER broadcasts for resuming players, created on the first.
+    # word_shown_at is when the current word came up, for the word stats.
+    __slots__ = ('game_id', 'players', 'names', 'state', 'current_guesser_id', 'current_category', 'word',
+                 'difficulty', 'round_score', 'round_skips', 'timer_start', 'timer_duration', 'words_used',
+                 'used_count', 'decks', 'word_seq', 'word_shown_at', 'last_word_change', 'last_activity', 'version',
+                 'log_seq', 'encoded_state', 'replay')
+
+    def __init__(self, game_id):
+        self.game_id = game_id
+        self.players = {}
+        self.names = {}
+        self.state = 'lobby'
+        self.current_guesser_id = None
+        self.current_category = None
+        self.word = None
+        self.difficulty = 'normal'
+        self.round_score = 0
+        self.round_skips = 0
+        self.timer_start = None
+        self.timer_duration = 60
+        self.words_used = None
+        self.used_count = 0
+        self.decks = None
+        self.word_seq = 0
+        self.word_shown_at = None
+        self.last_word_change = None
+        self.last_activity = datetime.now()
+        self.version = 0
+        self.log_seq = 0
+        self.encoded_state = None
+        self.replay = None
+
+    @property
+    def current_word(self):
+        if self.word is None:
+            return None
+        return WORDS[self.current_category][self.word]
+
+    def add_player(self, player_id, player):
+        self.players[player_id] = player
+        self.names.setdefault(player.name, player_id)
+
+    def rename_player(self, player_id, name):
+        player = self.players[player_id]
+        if self.names.get(player.name) == player_id:
+            del self.names[player.name]
+        player.name = name
+        self.names.setdefault(name, player_id)
+
+    def used_words(self):
+        if self.words_used is None or self.current_category is None:
+            return []
+        words = WORDS[self.current_category]
+        return sorted(words[i] for i in range(len(words)) if wordstats.is_used(self.words_used, i))
+
+    def use_word(self, word):
+        used = self.words_used
+        if used is None:
+            used = self.words_used = bytearray((len(WORDS[self.current_category]) + 7) >> 3)
+            self.used_count = 0
+        byte, bit = word >> 3, 1 << (word & 7)
+        if not used[byte] & bit:
+            used[byte] |= bit
+            self.used_count += 1
+        elif self.used_count == len(WORDS[self.current_category]):
+            # Every word in the category has come up, so the round starts
+            # remembering from scratch. Clearing is O(category) but happens
+            # once per pass through it.
+            used[:] = bytes(len(used))
+            used[byte] |= bit
+            self.used_count = 1
+        self.word = word
 
 def create_game():
     game_id = generate_game_code()
-    games[game_id] = {
-        'game_id': game_id,
-        'players': {},
-        'state': 'lobby',
-        'current_guesser_id': None,
-        'current_category': None,
-        'current_word': None,
-        'round_score': 0,
-        'round_skips': 0,
-        'timer_start': None,
-        'timer_duration': 60,
-        'words_used_this_round': [],
-        'last_word_change': None,
-        'last_activity': datetime.now()
-    }
+    games[game_id] = Game(game_id)
+    mailboxes[game_id] = Mailbox()
+    log_event(games[game_id], 'create')
+    schedule_reap(game_id, games[game_id].last_activity + timedelta(seconds=GAME_IDLE_TTL))
     return game_id
 
-def get_next_word(game_id):
-    game = games[game_id]
-    category = game['current_category']
-    available_words = [w for w in WORDS[category] if w not in game['words_used_this_round']]
+class Mailbox:
+    __slots__ = ('queue', 'lock')
+
+    def __init__(self):
+        self.queue = deque()
+        self.lock = threading.Lock()
+
+def dispatch(game_id, fn, *args):
+    mailbox = mailboxes.get(game_id)
+    if mailbox is None:
+        # Unknown game: nothing to serialise against, the handler reports it.
+        return fn(*args)
+
+    mailbox.queue.append((fn, args, time.perf_counter()))
+    # Whoever holds the lock drains the queue, so a game's messages run one at a
+    # time in arrival order while other games run in parallel. The queue is
+    # checked again after release to pick up a message appended meanwhile.
+    while mailbox.queue and mailbox.lock.acquire(blocking=False):
+        try:
+            while mailbox.queue:
+                fn, args, queued_at = mailbox.queue.popleft()
+                wait = time.perf_counter() - queued_at
+                metrics.mailbox_wait.observe(wait)
+                if wait > load_stats['mailbox_wait']:
+                    load_stats['mailbox_wait'] = wait
+                try:
+                    fn(*args)
+                except Exception:
+                    app.logger.exception('Error in %s for game %s', fn.__name__, game_id)
+        finally:
+            mailbox.lock.release()
+
+def log_event(game, kind, *fields):
+    if event_log is not None:
+        game.log_seq = event_log.append([kind, game.game_id, *fields])
+
+def schedule_reap(game_id, expires_at):
+    heapq.heappush(reap_queue, (expires_at, game_id))
+
+def reap_idle_games(now=None):
+    now = now or datetime.now()
+    evicted_before = reaper_stats['evicted_games']
+
+    # Each game has exactly one entry in reap_queue. The decision is made in the
+    # game's mailbox so it cannot interleave with a join.
+    while reap_queue and reap_queue[0][0] <= now:
+        _, game_id = heapq.heappop(reap_queue)
+        dispatch(game_id, reap_game, game_id, now)
+
+    reaper_stats['sweeps'] += 1
+    return reaper_stats['evicted_games'] - evicted_before
+
+def reap_game(game_id, now):
+    game = games.get(game_id)
+    if game is None:
+        return
+
+    # Games touched since they were queued are pushed back with their new
+    # deadline instead of evicted.
+    ttl = timedelta(seconds=GAME_IDLE_TTL)
+    expires_at = game.last_activity + ttl
+    if expires_at > now:
+        schedule_reap(game_id, expires_at)
+        return
+
+    if any(player.connected for player in game.players.values()):
+        schedule_reap(game_id, now + ttl)
+        return
+
+    for player in game.players.values():
+        if sid_index.get(player.sid, (None,))[0] == game_id:
+            sid_index.pop(player.sid, None)
+    log_event(game, 'evict')
+    del games[game_id]
+    mailboxes.pop(game_id, None)
+    pending_updates.pop(game_id, None)
+    spectated.pop(game_id, None)
+    game_codes.release(game_id)
+    reaper_stats['evicted_games'] += 1
+    reaper_stats['evicted_players'] += len(game.players)
+
+def reaper_loop():
+    while True:
+        socketio.sleep(GAME_REAP_INTERVAL)
+        reap_idle_games()
+        rate_limiter.sweep()
 
-    if not available_words:
-        available_words = WORDS[category]
-        game['words_used_this_round'] = []
+def schedule_round_end(game_id):
+    game = games[game_id]
+    deadline = game.timer_start + game.timer_duration
+    heapq.heappush(round_timers, (deadline, game_id, game.timer_start))
+
+def expire_round_timers(now=None):
+    now = now or time.time()
+    expired = 0
+
+    # Entries are never removed early; an entry whose timer_start no longer
+    # matches the game belongs to a round that already ended another way.
+    while round_timers and round_timers[0][0] <= now:
+        _, game_id, timer_start = heapq.heappop(round_timers)
+        game = games.get(game_id)
+        if game is None or game.timer_start != timer_start:
+            continue
+        dispatch(game_id, expire_round, game_id, timer_start)
+        expired += 1
+
+    return expired
+
+def expire_round(game_id, timer_start):
+    game = games.get(game_id)
+    if game is not None and game.timer_start == timer_start:
+        end_round(game_id)
+
+def round_timer_loop():
+    while True:
+        socketio.sleep(ROUND_TIMER_RESOLUTION)
+        expire_round_timers()
+
+def sample_lag(loop_lag):
+    # Lag is the worse of how late the sampler woke up and the longest any game
+    # event sat in a mailbox since the last sample. It rises at once and halves
+    # each sample, so one bad tick starts shedding and a few quiet ones end it.
+    sample = max(loop_lag, load_stats['mailbox_wait'])
+    load_stats['loop_lag'] = loop_lag
+    load_stats['mailbox_wait'] = 0.0
+    load_stats['lag'] = max(sample, load_stats['lag'] * 0.5)
+
+def overloaded():
+    return SHED_LAG > 0 and load_stats['lag'] > SHED_LAG
+
+def lag_monitor_loop():
+    while True:
+        start = time.perf_counter()
+        socketio.sleep(LAG_SAMPLE_INTERVAL)
+        sample_lag(max(0.0, time.perf_counter() - start - LAG_SAMPLE_INTERVAL))
+
+def start_background_tasks():
+    socketio.start_background_task(reaper_loop)
+    socketio.start_background_task(round_timer_loop)
+    if SHED_LAG:
+        socketio.start_background_task(lag_monitor_loop)
+    socketio.start_background_task(spectator_loop)
+    if COALESCE_INTERVAL:
+        socketio.start_background_task(coalesce_loop)
+    if SNAPSHOT_PATH:
+        socketio.start_background_task(snapshot_loop)
+    word_stats.start()
+
+class WordDeck:
+    # words holds the category's indexes in the narrowest array type that fits
+    # them: a byte each for the shipped 55-word categories, wider for big packs.
+    __slots__ = ('words', 'cursor')
+
+    def __init__(self, size):
+        self.words = array('B' if size <= 1 << 8 else 'H' if size <= 1 << 16 else 'I', range(size))
+        random.shuffle(self.words)
+        self.cursor = 0
+
+    def reshuffle(self, used):
+        random.shuffle(self.words)
+        # Words already seen this round go to the back so they only come up
+        # again once every other word in the category has been drawn.
+        if used is not None:
+            seen = [w for w in self.words if used[w >> 3] >> (w & 7) & 1]
+            if seen:
+                seen_set = set(seen)
+                self.words = array(self.words.typecode, [w for w in self.words if w not in seen_set] + seen)
+        self.cursor = 0
+
+    def draw(self, used):
+        # Words already used this round are passed over: a deck built after a
+        # restore, or for a round that also draws from the weighted sampler,
+        # knows nothing about them. Once every word is used, any will do.
+        for _ in range(len(self.words)):
+            if self.cursor == len(self.words):
+                self.reshuffle(used)
+            word = self.words[self.cursor]
+            self.cursor += 1
+            if not wordstats.is_used(used, word):
+                break
+        return word
 
-    word = random.choice(available_words)
-    game['words_used_this_round'].append(word)
-    game['current_word'] = word
-    return word
+def get_next_word(game_id):
+    game = games[game_id]
+    category = game.current_category
+    word = None
+    if game.difficulty != 'normal':
+        # The weighted tables are shared by every game, so these modes build no
+        # per-game deck unless the sampler keeps hitting used words.
+        word = word_stats.draw(category, game.difficulty, game.words_used)
+
+    if word is None:
+        if game.decks is None:
+            game.decks = {}
+        deck = game.decks.get(category)
+
+        if deck is None:
+            deck = game.decks[category] = WordDeck(len(WORDS[category]))
+        word = deck.draw(game.words_used)
+
+    game.use_word(word)
+    game.word_seq += 1
+    game.word_shown_at = time.time()
+    return game.current_word
+
+def record_word_outcome(game, correct):
+    # Called once accept_word_change has stamped last_word_change, before the
+    # next word replaces the one being scored. Games restored mid-word have no
+    # word_shown_at and go unrecorded until their next word.
+    if game.word is not None and game.word_shown_at is not None:
+        word_stats.record(game.current_category, game.word, correct, game.last_word_change - game.word_shown_at)
 
 def get_game_state(game_id):
     if game_id not in games:
@@ -84,1472 +595,919 @@ def get_game_state(game_id):
 
     game = games[game_id]
     players_list = []
-    for pid, player in game['players'].items():
+    for pid, player in game.players.items():
         players_list.append({
             'player_id': pid,
-            'name': player['name'],
-            'score': player['score'],
-            'skips': player['skips'],
-            'connected': player['connected']
+            'name': player.name,
+            'score': player.score,
+            'skips': player.skips,
+            'connected': player.connected
         })
 
-    time_remaining = None
-    if game['timer_start']:
-        elapsed = time.time() - game['timer_start']
-        time_remaining = max(0, game['timer_duration'] - elapsed)
-
     return {
         'game_id': game_id,
         'players': players_list,
-        'state': game['state'],
-        'current_guesser_id': game['current_guesser_id'],
-        'current_category': game['current_category'],
-        'round_score': game['round_score'],
-        'round_skips': game['round_skips'],
-        'time_remaining': time_remaining,
-        'categories': list(WORDS.keys())
+        'state': game.state,
+        'current_guesser_id': game.current_guesser_id,
+        'current_category': game.current_category,
+        'difficulty': game.difficulty,
+        'round_score': game.round_score,
+        'round_skips': game.round_skips,
+        'word_seq': game.word_seq,
+        'time_remaining': round_time_remaining(game),
+        'categories': list(WORDS.keys()),
+        'version': game.version
+    }
+
+def round_time_remaining(game):
+    if not game.timer_start:
+        return None
+    return max(0, game.timer_duration - (time.time() - game.timer_start))
+
+def game_state_json(game_id):
+    # Every change to what get_game_state returns bumps the version, so the state
+    # is encoded once per version no matter how many packets carry it. Only the
+    # clock is re-encoded per call.
+    game = games[game_id]
+    cached = game.encoded_state
+    if cached is None or cached[0] != game.version:
+        state = get_game_state(game_id)
+        del state['time_remaining']
+        cached = game.encoded_state = (game.version, json.dumps(state, separators=(',', ':'))[:-1])
+    return metrics.RawJSON(f'{cached[1]},"time_remaining":{json.dumps(round_time_remaining(game))}}}')
+
+def bump_version(game):
+    game.version += 1
+    return game.version
+
+def player_delta(player_id, player, *fields):
+    return {'players': {player_id: {field: getattr(player, field) for field in fields}}}
+
+class RoomUpdate:
+    __slots__ = ('from_version', 'version', 'delta')
+
+    def __init__(self, version):
+        self.from_version = version
+        self.version = version
+        self.delta = {}
+
+    def merge(self, version, delta):
+        # Deltas carry absolute values, so the newest value for each field wins.
+        self.version = version
+        for key, value in delta.items():
+            if key != 'players':
+                self.delta[key] = value
+                continue
+            players = self.delta.setdefault('players', {})
+            for player_id, fields in value.items():
+                players.setdefault(player_id, {}).update(fields)
+
+def binary_room(game_id):
+    return f'{game_id}:b'
+
+def leave_game_rooms(sid, game_id):
+    for room in (game_id, binary_room(game_id)):
+        socketio.server.leave_room(sid, room, namespace='/')
+
+def send_binary(event, payload, to, skip_sid=None):
+    data = wire.encode(payload)
+    socketio.emit(event, data, to=to, skip_sid=skip_sid)
+    metrics.record_attachment(event, len(data))
+
+def send_to(sid, event, payload):
+    if sid in binary_sids:
+        send_binary(event, payload, sid)
+    else:
+        socketio.emit(event, payload, to=sid)
+
+def emit_to_room(game_id, event, payload, skip_sid=None):
+    # JSON and MessagePack connections sit in separate rooms so each encoding is
+    # done once per broadcast; the binary one only when someone asked for it.
+    socketio.emit(event, payload, to=game_id, skip_sid=skip_sid)
+    room = binary_room(game_id)
+    if room in socketio.server.manager.rooms.get('/', {}):
+        send_binary(event, payload, room, skip_sid)
+
+def broadcast_update(game_id, event, payload, skip_sid=None):
+    # Presence updates (joins, leaves, renames). With CRANIUM_COALESCE_INTERVAL
+    # set they are merged per room and sent as one room_update per tick, so a
+    # join storm in a big room costs one message per player per tick rather
+    # than one per join.
+    if not COALESCE_INTERVAL:
+        emit_to_room(game_id, event, payload, skip_sid)
+        remember_broadcast(game_id, payload['version'], payload['version'], event, payload)
+        return
+
+    update = pending_updates.get(game_id)
+    if update is None:
+        update = pending_updates[game_id] = RoomUpdate(payload['version'])
+    update.merge(payload['version'], payload['delta'])
+
+def broadcast(game_id, event, payload):
+    # Everything else goes out at once, after any pending room_update so that
+    # clients still see versions in order.
+    flush_updates(game_id)
+    emit_to_room(game_id, event, payload)
+    game = games.get(game_id)
+    if game is not None:
+        remember_broadcast(game_id, game.version, game.version, event, payload)
+
+def flush_updates(game_id):
+    update = pending_updates.pop(game_id, None)
+    if update is not None:
+        payload = {
+            'from_version': update.from_version,
+            'version': update.version,
+            'delta': update.delta
+        }
+        emit_to_room(game_id, 'room_update', payload)
+        remember_broadcast(game_id, update.from_version, update.version, 'room_update', payload)
+
+def remember_broadcast(game_id, from_version, version, event, payload):
+    game = games.get(game_id)
+    if game is None or not REPLAY_BUFFER:
+        return
+    if game.replay is None:
+        game.replay = deque(maxlen=REPLAY_BUFFER)
+    game.replay.append((from_version, version, event, payload))
+
+def missed_broadcasts(game, since):
+    # Every version bump is broadcast, so the buffer is contiguous; it can serve
+    # a resume only if it still reaches back to the first version the client
+    # has not seen.
+    replay = game.replay
+    if not replay or replay[0][0] > since + 1 or since > game.version:
+        return None
+    return [(event, payload) for _, version, event, payload in replay if version > since]
+
+def coalesce_loop():
+    while True:
+        socketio.sleep(COALESCE_INTERVAL)
+        for game_id in list(pending_updates):
+            dispatch(game_id, flush_updates, game_id)
+
+# Spectators sit in their own room and never see per-click events. Once per
+# SPECTATOR_INTERVAL, each watched game whose version moved gets one summary,
+# encoded once for the whole audience, so players pay nothing per spectator.
+def spectator_room(game_id):
+    return f'{game_id}:s'
+
+def spectator_summary(game):
+    guesser = game.players.get(game.current_guesser_id)
+    top = heapq.nlargest(SPECTATOR_TOP_N, game.players.values(), key=lambda player: player.score)
+    audience = socketio.server.manager.rooms.get('/', {}).get(spectator_room(game.game_id), ())
+    return {
+        'game_id': game.game_id,
+        'version': game.version,
+        'state': game.state,
+        'guesser_name': guesser.name if guesser else None,
+        'current_category': game.current_category,
+        'difficulty': game.difficulty,
+        'round_score': game.round_score,
+        'round_skips': game.round_skips,
+        'time_remaining': round_time_remaining(game),
+        'top': [[player.name, player.score] for player in top],
+        'players': len(game.players),
+        'spectators': len(audience)
     }
 
+def flush_spectators(game_id):
+    game = games.get(game_id)
+    if game is None or spectator_room(game_id) not in socketio.server.manager.rooms.get('/', {}):
+        spectated.pop(game_id, None)
+        return
+    if spectated.get(game_id) == game.version:
+        return
+    spectated[game_id] = game.version
+    socketio.emit('spectator_update', spectator_summary(game), to=spectator_room(game_id))
+
+def spectator_loop():
+    while True:
+        socketio.sleep(SPECTATOR_INTERVAL)
+        for game_id in list(spectated):
+            dispatch(game_id, flush_spectators, game_id)
+
+def finish_round(game):
+    if game.current_guesser_id:
+        game.players[game.current_guesser_id].score += game.round_score
+        game.players[game.current_guesser_id].skips += game.round_skips
+
+    game.state = 'lobby'
+    game.timer_start = None
+    game.word = None
+
+def end_round(game_id):
+    game = games[game_id]
+
+    if game.state != 'active_round':
+        return
+
+    finish_round(game)
+    game.last_activity = datetime.now()
+    log_event(game, 'end')
+
+    delta = {'state': 'lobby', 'time_remaining': None}
+    guesser_id = game.current_guesser_id
+    if guesser_id in game.players:
+        delta.update(player_delta(guesser_id, game.players[guesser_id], 'score', 'skips'))
+
+    broadcast(game_id, 'round_ended', {
+        'final_score': game.round_score,
+        'final_skips': game.round_skips,
+        'guesser_id': guesser_id,
+        'version': bump_version(game),
+        'delta': delta
+    })
+
+def encode_game(game):
+    players = [[pid, p.name, p.score, p.skips] for pid, p in list(game.players.items())]
+    return json.dumps([
+        game.game_id, game.state, game.current_guesser_id, game.current_category,
+        game.current_word, game.round_score, game.round_skips, game.timer_start,
+        game.timer_duration, game.used_words(), game.version,
+        game.log_seq, players, game.difficulty
+    ], separators=(',', ':'))
+
+def word_index(category, word):
+    # None for a category or word that is no longer in words.json, as after a
+    # deploy that edits the word list.
+    return WORD_INDEX.get(category, {}).get(word)
+
+def decode_game(line):
+    # Format 2 lines end at players; format 3 adds the difficulty.
+    (game_id, state, guesser_id, category, word, round_score, round_skips, timer_start,
+     timer_duration, words_used, version, log_seq, players, *rest) = json.loads(line)
+    game = Game(game_id)
+    if rest:
+        game.difficulty = DIFFICULTIES.get(rest[0], 'normal')
+    for pid, name, score, skips in players:
+        game.add_player(pid, Player(name, score, skips))
+    game.state = state
+    game.current_guesser_id = guesser_id
+    game.current_category = CATEGORIES.get(category)
+    game.round_score = round_score
+    game.round_skips = round_skips
+    game.timer_start = timer_start
+    game.timer_duration = timer_duration
+    game.version = version
+    game.log_seq = log_seq
+    # Words or categories dropped from words.json since the snapshot are skipped.
+    game.word = word_index(game.current_category, word)
+    for used in words_used:
+        index = word_index(game.current_category, used)
+        if index is not None:
+            if game.words_used is None:
+                game.words_used = bytearray((len(WORDS[game.current_category]) + 7) >> 3)
+            if not game.words_used[index >> 3] >> (index & 7) & 1:
+                game.words_used[index >> 3] |= 1 << (index & 7)
+                game.used_count += 1
+    return game
+
+def snapshot_game(game_id):
+    # Runs in the game's mailbox, so a line never catches a handler between a
+    # mutation and its log record, which replay would then apply twice.
+    game = games.get(game_id)
+    if game is None:
+        return
+    cached = snapshot_lines.get(game_id)
+    if cached is None or cached[0] != game.version:
+        snapshot_lines[game_id] = (game.version, encode_game(game))
+        snapshot_stats['encoded_games'] += 1
+        snapshot_stats['unwritten'] += 1
+
+def write_snapshot(path=SNAPSHOT_PATH, background=False):
+    # Only games whose version moved since the last pass are re-encoded; the
+    # rest reuse their cached line, so a pass costs O(changed games). A game
+    # whose mailbox is being drained on another thread is encoded there and
+    # written by the next pass. A pass with nothing new writes nothing.
+    queued = 0
+    for game_id in list(games):
+        game = games.get(game_id)
+        if game is None:
+            continue
+        cached = snapshot_lines.get(game_id)
+        if cached is not None and cached[0] == game.version:
+            continue
+        dispatch(game_id, snapshot_game, game_id)
+        queued += 1
+        if queued % 500 == 0:
+            socketio.sleep(0)
+
+    for game_id in [gid for gid in snapshot_lines if gid not in games]:
+        del snapshot_lines[game_id]
+        snapshot_stats['unwritten'] += 1
+
+    if not snapshot_stats['unwritten']:
+        return queued
+    # One write at a time. A background pass that finds the last write still
+    # going leaves its changes to the next pass rather than racing it.
+    if not snapshot_file_lock.acquire(blocking=not background):
+        return queued
+    snapshot_stats['unwritten'] = 0
+    lines = [line for _, line in list(snapshot_lines.values())]
+    if background:
+        native.start_thread(write_snapshot_file, (path, lines))
+    else:
+        write_snapshot_file(path, lines)
+    return queued
+
+def write_snapshot_file(path, lines):
+    # Joining and fsyncing the whole file happens off the hub in the background,
+    # like the event log's writes. Holds snapshot_file_lock until done.
+    try:
+        header = json.dumps({'format': SNAPSHOT_FORMAT, 'saved_at': time.time()})
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(header + '\n')
+            f.write('\n'.join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        snapshot_stats['written'] += 1
+    except OSError:
+        snapshot_stats['unwritten'] += 1
+        app.logger.exception('Writing snapshot %s failed', path)
+    finally:
+        snapshot_file_lock.release()
+
+def restore_snapshot(path=SNAPSHOT_PATH):
+    if not path or not os.path.exists(path):
+        return 0
+
+    with open(path) as f:
+        header = json.loads(f.readline())
+        if header.get('format') not in (2, SNAPSHOT_FORMAT):
+            return 0
+        for line in f:
+            game = decode_game(line)
+            games[game.game_id] = game
+            snapshot_lines[game.game_id] = (game.version, line.rstrip('\n'))
+
+    snapshot_stats['restored_games'] = len(games)
+    return len(games)
+
+def apply_record(record):
+    seq, kind, game_id, *fields = record
+
+    if kind == 'create':
+        if game_id not in games:
+            games[game_id] = Game(game_id)
+            games[game_id].log_seq = seq
+        return True
+
+    game = games.get(game_id)
+    # Records at or below a game's log_seq are already reflected in its snapshot.
+    if game is None or seq <= game.log_seq:
+        return False
+    game.log_seq = seq
+
+    if kind == 'evict':
+        del games[game_id]
+        return True
+
+    if kind == 'join':
+        player_id, name = fields
+        if player_id not in game.players:
+            game.add_player(player_id, Player(name))
+    elif kind == 'start_round':
+        game.state = 'category_selection'
+        game.current_guesser_id = fields[0]
+        game.round_score = 0
+        game.round_skips = 0
+        game.words_used = None
+    elif kind == 'category':
+        game.current_category = CATEGORIES.get(fields[0])
+        game.words_used = None
+        game.difficulty = DIFFICULTIES.get(fields[1], 'normal') if len(fields) > 1 else 'normal'
+    elif kind == 'timer':
+        game.state = 'active_round'
+        game.timer_start = fields[0]
+        replay_word(game, fields[1])
+    elif kind in ('correct', 'skip'):
+        if kind == 'correct':
+            game.round_score += 1
+        else:
+            game.round_skips += 1
+        replay_word(game, fields[0])
+    elif kind == 'rename':
+        player_id, new_name = fields
+        if player_id in game.players:
+            game.rename_player(player_id, new_name)
+    elif kind == 'end':
+        finish_round(game)
+    elif kind == 'leave':
+        if fields[0] in game.players:
+            game.players[fields[0]].connected = False
+
+    game.version += 1
+    return True
+
+def replay_word(game, word):
+    # A word dropped from words.json since it was logged leaves the game without
+    # a current word rather than stopping the replay.
+    index = word_index(game.current_category, word)
+    if index is None:
+        game.word = None
+    else:
+        game.use_word(index)
+
+def replay_event_log(directory=EVENT_LOG_DIR):
+    applied = 0
+    last_seq = max((game.log_seq for game in games.values()), default=0)
+    for record in eventlog.read_records(directory):
+        if apply_record(record):
+            applied += 1
+        last_seq = max(last_seq, record[0])
+    return applied, last_seq
+
+def recover_games():
+    restored = restore_snapshot() if SNAPSHOT_PATH else 0
+    replayed, last_seq = replay_event_log() if EVENT_LOG_DIR else (0, 0)
+
+    for game_id, game in games.items():
+        mailboxes[game_id] = Mailbox()
+        game_codes.reserve(game_id)
+        schedule_reap(game_id, game.last_activity + timedelta(seconds=GAME_IDLE_TTL))
+        if game.state == 'active_round' and game.timer_start:
+            schedule_round_end(game_id)
+    return restored, replayed, last_seq
+
+def open_event_log(last_seq):
+    global event_log
+    event_log = eventlog.EventLog(EVENT_LOG_DIR, flush_interval=EVENT_LOG_FSYNC_INTERVAL, last_seq=last_seq)
+    event_log.start()
+
+def snapshot_loop():
+    while True:
+        socketio.sleep(SNAPSHOT_INTERVAL)
+        write_snapshot(background=True)
+
+def shutdown(signum, frame):
+    if SNAPSHOT_PATH:
+        write_snapshot()
+    word_stats.close()
+    if event_log is not None:
+        event_log.close()
+    sys.exit(0)
+
 @app.route('/')
 def index():
-    return render_template_string(HTML_TEMPLATE)
+    return assets.respond(pages['index'], request)
 
 @app.route('/game/<game_id>')
 def game(game_id):
-    return render_template_string(HTML_TEMPLATE)
-
-@socketio.on('create_game')
+    return assets.respond(pages['game'], request)
+
+@app.route('/static/<path:name>')
+def static_file(name):
+    asset = static_assets.files.get(name)
+    if asset is None:
+        return Response('Not Found', status=404)
+    return assets.respond(asset, request)
+
+@app.route('/metrics')
+def prometheus_metrics():
+    players = connected = rounds = 0
+    for game in list(games.values()):
+        players += len(game.players)
+        connected += sum(1 for player in list(game.players.values()) if player.connected)
+        if game.state != 'lobby':
+            rounds += 1
+
+    rooms = socketio.server.manager.rooms.get('/', {})
+    spectators = sum(len(rooms.get(spectator_room(game_id), ())) for game_id in list(spectated))
+
+    gauges = {
+        'games': ('Entries in the games dict.', len(games)),
+        'players': ('Players across all games.', players),
+        'players_connected': ('Players with a live socket.', connected),
+        'players_disconnected': ('Players kept for rejoin without a live socket.', players - connected),
+        'rounds_in_progress': ('Games with a round between start_round and round end.', rounds),
+        'round_timers_pending': ('Round expiry entries waiting in the scheduler.', len(round_timers)),
+        'sockets_indexed': ('Sockets mapped to a player in sid_index.', len(sid_index)),
+        'games_spectated': ('Games with at least one spectator.', len(spectated)),
+        'spectators': ('Sockets watching a game from the spectator tier.', spectators),
+        'game_codes_free': ('Game codes available to new games.', len(game_codes)),
+        'rate_limit_owners': ('Sockets and client IPs holding rate limit buckets.', len(rate_limiter)),
+        'connections': ('Open engine.io connections.', len(socketio.server.eio.sockets)),
+        'event_loop_lag_seconds': ('How late the last lag sample woke up.', load_stats['loop_lag']),
+        'load_lag_seconds': ('Smoothed event loop and mailbox lag that load shedding acts on.', load_stats['lag']),
+        'shedding': ('1 while new games and new players are being turned away for lag.', int(overloaded())),
+    }
+    counters = {
+        'snapshots_written': snapshot_stats['written'],
+        'snapshot_games_encoded': snapshot_stats['encoded_games'],
+        'event_log_records': event_log.stats['records'] if event_log else 0,
+        'event_log_fsyncs': event_log.stats['batches'] if event_log else 0,
+        'reaper_sweeps': reaper_stats['sweeps'],
+        'reaper_evicted_games': reaper_stats['evicted_games'],
+        'reaper_evicted_players': reaper_stats['evicted_players'],
+        'word_tables_rebuilt': word_stats.rebuilds,
+    }
+    return Response(metrics.render(gauges, counters), mimetype='text/plain; version=0.0.4')
+
+@app.route('/admin/profile')
+def admin_profile():
+    token = request.headers.get('Authorization', '').removeprefix('Bearer ') or request.args.get('token', '')
+    if not ADMIN_TOKEN or not hmac.compare_digest(token, ADMIN_TOKEN):
+        return Response('Not Found', status=404)
+
+    seconds = min(float(request.args.get('seconds', 10)), 120)
+    interval = max(float(request.args.get('interval', 0.005)), 0.001)
+    try:
+        result = profiler.profile(seconds, interval)
+    except profiler.ProfilerBusy:
+        return Response('A profile is already running', status=409)
+
+    if request.args.get('format') == 'collapsed':
+        return Response(result['collapsed'] + '\n', mimetype='text/plain')
+    return jsonify(result)
+
+@app.route('/stats')
+def stats():
+    return jsonify({
+        'games': len(games),
+        'idle_game_ttl': GAME_IDLE_TTL,
+        'reaper': reaper_stats
+    })
+
+@on_event('connect')
+def handle_connect(auth=None):
+    if MAX_CONNECTIONS and len(socketio.server.eio.sockets) > MAX_CONNECTIONS:
+        metrics.record_rejection('connect', 'connections')
+        raise ConnectionRefusedError('Server is full, try again later')
+    if auth and auth.get('wire') == 'msgpack' and wire.available():
+        binary_sids.add(request.sid)
+        # Sent as JSON: the client needs the key table before its first binary packet.
+        socketio.emit('wire', {'format': 'msgpack', 'keys': wire.KEYS}, to=request.sid)
+
+@on_event('create_game')
 def handle_create_game():
-    game_id = create_game()
-    emit('game_created', {'game_id': game_id})
+    if MAX_GAMES and len(games) >= MAX_GAMES:
+        metrics.record_rejection('create_game', 'games')
+        send_to(request.sid, 'error', {'message': 'Too many games running, try again later'})
+        return
+    if overloaded():
+        metrics.record_rejection('create_game', 'lag')
+        send_to(request.sid, 'error', {'message': 'Server is busy, try again in a moment'})
+        return
+    try:
+        game_id = create_game()
+    except GameCodesExhausted:
+        send_to(request.sid, 'error', {'message': 'No game codes left, try again later'})
+        return
+    send_to(request.sid, 'game_created', {'game_id': game_id})
+
+def game_not_found(sid):
+    send_to(sid, 'error', {'message': 'Game not found'})
 
-@socketio.on('join_game')
-def handle_join_game(data):
+@on_game_event('join_game')
+def handle_join_game(sid, data):
     game_id = data['game_id']
     player_name = data['player_name']
 
     if game_id not in games:
-        emit('error', {'message': 'Game not found'})
+        game_not_found(sid)
         return
 
     game = games[game_id]
-    existing_player_id = None
-
-    for pid, player in game['players'].items():
-        if player['name'] == player_name:
-            existing_player_id = pid
-            break
+    existing_player_id = game.names.get(player_name)
+
+    if existing_player_id is None:
+        # Players already in the game may always rejoin; only newcomers are turned away.
+        if MAX_PLAYERS_PER_GAME and len(game.players) >= MAX_PLAYERS_PER_GAME:
+            metrics.record_rejection('join_game', 'players')
+            send_to(sid, 'error', {'message': 'Game is full'})
+            return
+        if overloaded():
+            metrics.record_rejection('join_game', 'lag')
+            send_to(sid, 'error', {'message': 'Server is busy, try again in a moment'})
+            return
 
     if existing_player_id:
         player_id = existing_player_id
-        game['players'][player_id]['connected'] = True
-        game['players'][player_id]['sid'] = request.sid
+        old_sid = game.players[player_id].sid
+        if old_sid != sid and sid_index.get(old_sid) == (game_id, player_id):
+            sid_index.pop(old_sid, None)
+        game.players[player_id].connected = True
+        game.players[player_id].sid = sid
     else:
         player_id = str(uuid.uuid4())
-        game['players'][player_id] = {
-            'name': player_name,
-            'score': 0,
-            'skips': 0,
-            'connected': True,
-            'sid': request.sid
+        game.add_player(player_id, Player(player_name, connected=True, sid=sid))
+
+    # Leave Game keeps the socket open, so a socket can join a second game. The
+    # player it leaves behind goes through the same path as a disconnect, in
+    # its own game's mailbox.
+    previous = sid_index.get(sid)
+    if previous is not None and previous != (game_id, player_id):
+        leave_game_rooms(sid, previous[0])
+        dispatch(previous[0], handle_player_left, sid, *previous)
+    sid_index[sid] = (game_id, player_id)
+    game.last_activity = datetime.now()
+    log_event(game, 'join', player_id, game.players[player_id].name)
+
+    # A reconnecting player that says which version it last saw gets only the
+    # broadcasts it missed, when they are still buffered, instead of a snapshot.
+    missed = None
+    if existing_player_id and 'resume_from' in data:
+        flush_updates(game_id)
+        if data.get('epoch') == SERVER_EPOCH:
+            missed = missed_broadcasts(game, data['resume_from'])
+        metrics.increment('session_resumes' if missed is not None else 'session_resume_fallbacks')
+
+    socketio.server.enter_room(sid, binary_room(game_id) if sid in binary_sids else game_id, namespace='/')
+    version = bump_version(game)
+
+    if missed is not None:
+        for event, payload in missed:
+            send_to(sid, event, payload)
+        metrics.increment('session_replayed_events', len(missed))
+        send_to(sid, 'joined_game', {
+            'player_id': player_id,
+            'epoch': SERVER_EPOCH,
+            'resumed': True,
+            'time_remaining': round_time_remaining(game)
+        })
+    else:
+        response = {
+            'player_id': player_id,
+            'epoch': SERVER_EPOCH,
+            'game_state': game_state_json(game_id)
         }
 
-    game['last_activity'] = datetime.now()
-    join_room(game_id)
-
-    game = games[game_id]
-    response = {
-        'player_id': player_id,
-        'game_state': get_game_state(game_id)
-    }
-
-    if game['state'] == 'active_round' and game['current_word']:
-        response['current_word'] = game['current_word']
+        if game.state == 'active_round' and game.current_word:
+            response['current_word'] = game.current_word
 
-    emit('joined_game', response)
+        send_to(sid, 'joined_game', response)
 
-    emit('player_joined', {
+    # A resumed client has no snapshot covering its own rejoin, so it gets the
+    # player_joined like everyone else.
+    broadcast_update(game_id, 'player_joined', {
         'player_name': player_name,
-        'game_state': get_game_state(game_id)
-    }, room=game_id, skip_sid=request.sid)
+        'version': version,
+        'delta': player_delta(player_id, game.players[player_id], 'name', 'score', 'skips', 'connected')
+    }, skip_sid=None if missed is not None else sid)
 
-@socketio.on('start_round')
-def handle_start_round(data):
+@on_game_event('start_round')
+def handle_start_round(sid, data):
     game_id = data['game_id']
     player_id = data['player_id']
 
     if game_id not in games:
-        emit('error', {'message': 'Game not found'})
+        game_not_found(sid)
         return
 
     game = games[game_id]
-    game['state'] = 'category_selection'
-    game['current_guesser_id'] = player_id
-    game['round_score'] = 0
-    game['round_skips'] = 0
-    game['words_used_this_round'] = []
-    game['last_activity'] = datetime.now()
-
-    emit('round_started', {
-        'guesser_name': game['players'][player_id]['name'],
-        'game_state': get_game_state(game_id)
-    }, room=game_id)
-
-@socketio.on('select_category')
-def handle_select_category(data):
+    game.state = 'category_selection'
+    game.current_guesser_id = player_id
+    game.round_score = 0
+    game.round_skips = 0
+    game.words_used = None
+    game.last_activity = datetime.now()
+    log_event(game, 'start_round', player_id)
+    bump_version(game)
+
+    broadcast(game_id, 'round_started', {
+        'guesser_name': game.players[player_id].name,
+        'game_state': game_state_json(game_id)
+    })
+
+@on_game_event('select_category')
+def handle_select_category(sid, data):
     game_id = data['game_id']
-    category = data['category']
+    category = CATEGORIES.get(data['category'])
 
     if game_id not in games:
-        emit('error', {'message': 'Game not found'})
+        game_not_found(sid)
+        return
+
+    if category is None:
+        send_to(sid, 'error', {'message': 'Unknown category'})
         return
 
     game = games[game_id]
-    game['current_category'] = category
-    game['last_activity'] = datetime.now()
+    difficulty = DIFFICULTIES.get(data.get('difficulty', game.difficulty))
+    if difficulty is None:
+        send_to(sid, 'error', {'message': 'Unknown difficulty'})
+        return
 
-    emit('category_selected', {
+    game.current_category = category
+    # The bitmap is sized to its category, and another category's words mean nothing.
+    game.words_used = None
+    game.difficulty = difficulty
+    game.last_activity = datetime.now()
+    log_event(game, 'category', category, difficulty)
+    bump_version(game)
+
+    broadcast(game_id, 'category_selected', {
         'category': category,
-        'game_state': get_game_state(game_id)
-    }, room=game_id)
+        'game_state': game_state_json(game_id)
+    })
 
-@socketio.on('start_timer')
-def handle_start_timer(data):
+@on_game_event('start_timer')
+def handle_start_timer(sid, data):
     game_id = data['game_id']
 
     if game_id not in games:
-        emit('error', {'message': 'Game not found'})
+        game_not_found(sid)
         return
 
     game = games[game_id]
-    game['state'] = 'active_round'
-    game['timer_start'] = time.time()
-    game['last_word_change'] = None
-    game['last_activity'] = datetime.now()
+    game.state = 'active_round'
+    game.timer_start = time.time()
+    game.last_word_change = None
+    game.last_activity = datetime.now()
 
     word = get_next_word(game_id)
+    schedule_round_end(game_id)
+    log_event(game, 'timer', game.timer_start, word)
+    bump_version(game)
 
-    emit('timer_started', {
+    broadcast(game_id, 'timer_started', {
         'word': word,
-        'game_state': get_game_state(game_id)
-    }, room=game_id)
+        'game_state': game_state_json(game_id)
+    })
+
+def accept_word_change(game, data):
+    if game.state != 'active_round':
+        return False
 
-@socketio.on('correct_guess')
-def handle_correct_guess(data):
+    current_time = time.time()
+    if game.timer_duration - (current_time - game.timer_start) <= 0:
+        return False
+
+    # Clicks name the word they were made on, so when several hinters click the
+    # same word only the first one (in mailbox order) counts. Older clients
+    # that do not send word_seq fall back to the 0.3s debounce.
+    if 'word_seq' in data:
+        if data['word_seq'] != game.word_seq:
+            return False
+    elif game.last_word_change and (current_time - game.last_word_change) < 0.3:
+        return False
+
+    game.last_activity = datetime.now()
+    game.last_word_change = current_time
+    return True
+
+@on_game_event('correct_guess')
+def handle_correct_guess(sid, data):
     game_id = data['game_id']
 
     if game_id not in games:
-        emit('error', {'message': 'Game not found'})
+        game_not_found(sid)
         return
 
     game = games[game_id]
-
-    if game['state'] != 'active_round':
+    if not accept_word_change(game, data):
         return
 
-    time_remaining = game['timer_duration'] - (time.time() - game['timer_start'])
-    if time_remaining <= 0:
-        return
-
-    current_time = time.time()
-    if game['last_word_change'] and (current_time - game['last_word_change']) < 0.3:
-        return
-
-    game['round_score'] += 1
-    game['last_activity'] = datetime.now()
-    game['last_word_change'] = current_time
-
+    game.round_score += 1
+    record_word_outcome(game, True)
     word = get_next_word(game_id)
+    log_event(game, 'correct', word)
 
-    emit('word_changed', {
+    broadcast(game_id, 'word_changed', {
         'word': word,
-        'round_score': game['round_score'],
-        'game_state': get_game_state(game_id),
-        'action': 'correct'
-    }, room=game_id)
+        'action': 'correct',
+        'version': bump_version(game),
+        'delta': {'round_score': game.round_score, 'word_seq': game.word_seq}
+    })
 
-@socketio.on('skip_word')
-def handle_skip_word(data):
+@on_game_event('skip_word')
+def handle_skip_word(sid, data):
     game_id = data['game_id']
 
     if game_id not in games:
-        emit('error', {'message': 'Game not found'})
+        game_not_found(sid)
         return
 
     game = games[game_id]
-
-    if game['state'] != 'active_round':
-        return
-
-    time_remaining = game['timer_duration'] - (time.time() - game['timer_start'])
-    if time_remaining <= 0:
-        return
-
-    current_time = time.time()
-    if game['last_word_change'] and (current_time - game['last_word_change']) < 0.3:
+    if not accept_word_change(game, data):
         return
 
-    game['round_skips'] += 1
-    game['last_activity'] = datetime.now()
-    game['last_word_change'] = current_time
-
+    game.round_skips += 1
+    record_word_outcome(game, False)
     word = get_next_word(game_id)
+    log_event(game, 'skip', word)
 
-    emit('word_changed', {
+    broadcast(game_id, 'word_changed', {
         'word': word,
-        'round_score': game['round_score'],
-        'round_skips': game['round_skips'],
-        'game_state': get_game_state(game_id),
-        'action': 'skip'
-    }, room=game_id)
-
-@socketio.on('rename_player')
-def handle_rename_player(data):
+        'action': 'skip',
+        'version': bump_version(game),
+        'delta': {'round_skips': game.round_skips, 'word_seq': game.word_seq}
+    })
+
+@on_game_event('rename_player')
+def handle_rename_player(sid, data):
     game_id = data['game_id']
     player_id = data['player_id']
     new_name = data['new_name'].strip()
 
     if game_id not in games:
-        emit('error', {'message': 'Game not found'})
+        game_not_found(sid)
         return
 
     if not new_name:
-        emit('error', {'message': 'Name cannot be empty'})
+        send_to(sid, 'error', {'message': 'Name cannot be empty'})
         return
 
     game = games[game_id]
-    if player_id in game['players']:
-        game['players'][player_id]['name'] = new_name
-        game['last_activity'] = datetime.now()
+    if game.names.get(new_name, player_id) != player_id:
+        send_to(sid, 'error', {'message': 'Name already taken'})
+        return
 
-        emit('player_renamed', {
+    if player_id in game.players:
+        game.rename_player(player_id, new_name)
+        game.last_activity = datetime.now()
+        log_event(game, 'rename', player_id, new_name)
+
+        broadcast_update(game_id, 'player_renamed', {
             'player_id': player_id,
-            'new_name': new_name,
-            'game_state': get_game_state(game_id)
-        }, room=game_id)
+            'version': bump_version(game),
+            'delta': player_delta(player_id, game.players[player_id], 'name')
+        })
 
-@socketio.on('end_round')
-def handle_end_round(data):
+@on_game_event('end_round')
+def handle_end_round(sid, data):
     game_id = data['game_id']
 
     if game_id not in games:
-        emit('error', {'message': 'Game not found'})
+        game_not_found(sid)
         return
 
-    game = games[game_id]
-
-    if game['state'] != 'active_round':
-        return
-
-    if game['current_guesser_id']:
-        game['players'][game['current_guesser_id']]['score'] += game['round_score']
-        game['players'][game['current_guesser_id']]['skips'] += game['round_skips']
-
-    game['state'] = 'lobby'
-    game['timer_start'] = None
-    game['current_word'] = None
-    game['last_activity'] = datetime.now()
-
-    emit('round_ended', {
-        'final_score': game['round_score'],
-        'final_skips': game['round_skips'],
-        'guesser_id': game['current_guesser_id'],
-        'game_state': get_game_state(game_id)
-    }, room=game_id)
-
-@socketio.on('disconnect')
-def handle_disconnect():
-    for game_id, game in games.items():
-        for player_id, player in game['players'].items():
-            if player.get('sid') == request.sid:
-                player['connected'] = False
-                emit('player_left', {
-                    'player_name': player['name'],
-                    'game_state': get_game_state(game_id)
-                }, room=game_id)
-                break
-
-HTML_TEMPLATE = """
-<!DOCTYPE html>
-<html>
-<head>
-    <title>Cranium Charades</title>
-    <meta name="viewport" content="width=device-width, initial-scale=1">
-    <script src="https://cdn.socket.io/4.8.1/socket.io.min.js"></script>
-    <style>
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }
-
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: linear-gradient(135deg, #1e293b 0%, #0f172a 100%);
-            min-height: 100vh;
-            color: #f1f5f9;
-            padding: 20px;
-        }
-
-        .container {
-            max-width: 600px;
-            margin: 0 auto;
-        }
-
-        .screen {
-            display: none;
-            animation: fadeIn 0.3s ease-in;
-        }
-
-        .screen.active {
-            display: block;
-        }
-
-        @keyframes fadeIn {
-            from { opacity: 0; transform: translateY(10px); }
-            to { opacity: 1; transform: translateY(0); }
-        }
-
-        h1 {
-            font-size: 2.5em;
-            text-align: center;
-            margin: 40px 0 20px;
-        }
-
-        .emoji {
-            text-align: center;
-            font-size: 4em;
-            margin: 20px 0;
-        }
-
-        .card {
-            background: #1e293b;
-            border: 2px solid #334155;
-            border-radius: 15px;
-            padding: 30px;
-            margin: 20px 0;
-            box-shadow: 0 10px 30px rgba(0,0,0,0.3);
-        }
-
-        button {
-            width: 100%;
-            padding: 18px;
-            font-size: 1.1em;
-            font-weight: 600;
-            border: none;
-            border-radius: 10px;
-            cursor: pointer;
-            transition: transform 0.2s, box-shadow 0.2s;
-            margin: 10px 0;
-        }
-
-        button:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 5px 20px rgba(0,0,0,0.4);
-        }
-
-        button:active {
-            transform: translateY(0);
-        }
-
-        .btn-primary {
-            background: linear-gradient(135deg, #06b6d4 0%, #0891b2 100%);
-            color: white;
-        }
-
-        .btn-secondary {
-            background: #334155;
-            color: #f1f5f9;
-            border: 2px solid #475569;
-        }
-
-        .btn-success {
-            background: linear-gradient(135deg, #10b981 0%, #059669 100%);
-            color: white;
-        }
-
-        .btn-danger {
-            background: linear-gradient(135deg, #f59e0b 0%, #d97706 100%);
-            color: white;
-        }
-
-        input {
-            width: 100%;
-            padding: 15px;
-            font-size: 1.1em;
-            border: 2px solid #475569;
-            border-radius: 10px;
-            margin: 10px 0;
-            background: #0f172a;
-            color: #f1f5f9;
-        }
-
-        input:focus {
-            outline: none;
-            border-color: #06b6d4;
-        }
-
-        .players-list {
-            list-style: none;
-            margin: 20px 0;
-        }
-
-        .player-item {
-            background: #0f172a;
-            border: 2px solid #475569;
-            padding: 15px;
-            margin: 10px 0;
-            border-radius: 10px;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-        }
-
-        .player-item.highlight {
-            background: #fef3c7;
-            color: #78350f;
-            border: 3px solid #fbbf24;
-            transform: scale(1.05);
-            box-shadow: 0 5px 15px rgba(251, 191, 36, 0.3);
-            font-size: 1.1em;
-        }
+    end_round(game_id)
 
-        .player-name-editable {
-            cursor: pointer;
-            transition: opacity 0.2s;
-        }
-
-        .player-name-editable:hover {
-            opacity: 0.7;
-            text-decoration: underline;
-        }
-
-        .timer {
-            font-size: 3em;
-            text-align: center;
-            margin: 20px 0;
-            font-weight: bold;
-            color: #06b6d4;
-        }
-
-        .timer.warning {
-            color: #fbbf24;
-        }
-
-        .timer.danger {
-            color: #f97316;
-            animation: pulse 1s infinite;
-        }
-
-        @keyframes pulse {
-            0%, 100% { transform: scale(1); }
-            50% { transform: scale(1.1); }
-        }
-
-        .word-display {
-            font-size: 2.5em;
-            text-align: center;
-            margin: 30px 0;
-            padding: 40px;
-            background: #06b6d4;
-            color: white;
-            border-radius: 15px;
-            font-weight: bold;
-            min-height: 120px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            box-shadow: 0 5px 20px rgba(6, 182, 212, 0.3);
-        }
-
-        .score {
-            font-size: 2em;
-            text-align: center;
-            margin: 20px 0;
-            color: #06b6d4;
-        }
-
-        .game-code {
-            text-align: center;
-            font-size: 1.3em;
-            margin: 20px 0;
-            padding: 15px;
-            background: #0f172a;
-            border: 2px solid #06b6d4;
-            border-radius: 10px;
-            font-weight: 600;
-            color: #06b6d4;
-        }
-
-        .game-code-subtitle {
-            text-align: center;
-            font-size: 1.1em;
-            margin: 10px 0 20px;
-            color: #94a3b8;
-            font-weight: 500;
-        }
-
-        .game-footer {
-            margin-top: 20px;
-            padding: 15px;
-            background: #0f172a;
-            border: 2px solid #475569;
-            border-radius: 10px;
-            display: flex;
-            align-items: center;
-            gap: 10px;
-        }
-
-        .game-url {
-            flex: 1;
-            font-size: 0.85em;
-            word-break: break-all;
-            color: #94a3b8;
-        }
-
-        .copy-icon {
-            background: #334155;
-            border: 2px solid #475569;
-            padding: 10px 15px;
-            border-radius: 8px;
-            cursor: pointer;
-            font-size: 1.2em;
-            transition: background 0.2s;
-            width: auto;
-            margin: 0;
-        }
-
-        .copy-icon:hover {
-            background: #475569;
-        }
-
-        .share-link {
-            word-break: break-all;
-            background: rgba(255, 255, 255, 0.9);
-            color: #667eea;
-            padding: 10px;
-            border-radius: 5px;
-            margin: 10px 0;
-            font-size: 0.9em;
-        }
-
-        .category-grid {
-            display: grid;
-            grid-template-columns: 1fr;
-            gap: 10px;
-            margin: 20px 0;
-        }
-
-        @media (min-width: 500px) {
-            .category-grid {
-                grid-template-columns: 1fr 1fr;
-            }
-        }
-
-        .waiting-message {
-            text-align: center;
-            font-size: 1.2em;
-            padding: 40px 20px;
-        }
-
-        .text-center {
-            text-align: center;
-        }
-
-        .mb-10 {
-            margin-bottom: 10px;
-        }
-
-        .mb-20 {
-            margin-bottom: 20px;
-        }
-
-        .flash-message {
-            position: fixed;
-            top: 50%;
-            left: 50%;
-            transform: translate(-50%, -50%);
-            font-size: 4em;
-            font-weight: bold;
-            padding: 40px 60px;
-            border-radius: 20px;
-            z-index: 1000;
-            animation: flashIn 1.2s ease-out;
-            pointer-events: none;
-        }
-
-        .flash-correct {
-            background: linear-gradient(135deg, #10b981 0%, #059669 100%);
-            color: white;
-            box-shadow: 0 10px 40px rgba(16, 185, 129, 0.5);
-        }
-
-        .flash-skip {
-            background: linear-gradient(135deg, #f59e0b 0%, #d97706 100%);
-            color: white;
-            box-shadow: 0 10px 40px rgba(245, 158, 11, 0.5);
-            top: 20%;
-        }
-
-        @keyframes flashIn {
-            0% {
-                opacity: 0;
-                transform: translate(-50%, -50%) scale(0.5);
-            }
-            50% {
-                opacity: 1;
-                transform: translate(-50%, -50%) scale(1.1);
-            }
-            100% {
-                opacity: 0;
-                transform: translate(-50%, -50%) scale(1);
-            }
-        }
-
-        .toast {
-            position: fixed;
-            top: 20px;
-            left: 50%;
-            transform: translateX(-50%);
-            padding: 15px 25px;
-            border-radius: 10px;
-            font-size: 1em;
-            font-weight: 500;
-            z-index: 2000;
-            animation: toastSlideIn 0.3s ease-out, toastSlideOut 0.3s ease-in 2.7s;
-            box-shadow: 0 5px 20px rgba(0,0,0,0.3);
-        }
-
-        .toast-error {
-            background: linear-gradient(135deg, #ef4444 0%, #dc2626 100%);
-            color: white;
-        }
-
-        .toast-warning {
-            background: linear-gradient(135deg, #f59e0b 0%, #d97706 100%);
-            color: white;
-        }
-
-        @keyframes toastSlideIn {
-            from {
-                opacity: 0;
-                transform: translateX(-50%) translateY(-20px);
-            }
-            to {
-                opacity: 1;
-                transform: translateX(-50%) translateY(0);
-            }
-        }
-
-        @keyframes toastSlideOut {
-            from {
-                opacity: 1;
-                transform: translateX(-50%) translateY(0);
-            }
-            to {
-                opacity: 0;
-                transform: translateX(-50%) translateY(-20px);
-            }
-        }
-
-        .instructions {
-            margin-top: 20px;
-        }
-
-        .instructions-toggle {
-            background: transparent;
-            color: #94a3b8;
-            border: 2px solid #475569;
-            padding: 10px 20px;
-            font-size: 0.9em;
-            cursor: pointer;
-            border-radius: 8px;
-            transition: all 0.2s;
-        }
-
-        .instructions-toggle:hover {
-            background: #334155;
-            border-color: #06b6d4;
-            color: #06b6d4;
-        }
-
-        .instructions-modal {
-            display: none;
-            position: fixed;
-            top: 0;
-            left: 0;
-            right: 0;
-            bottom: 0;
-            background: rgba(0, 0, 0, 0.8);
-            z-index: 3000;
-            padding: 20px;
-            overflow-y: auto;
-        }
-
-        .instructions-modal.show {
-            display: flex;
-            align-items: center;
-            justify-content: center;
-        }
-
-        .instructions-content {
-            max-width: 600px;
-            width: 100%;
-            padding: 30px;
-            background: #1e293b;
-            border: 2px solid #06b6d4;
-            border-radius: 15px;
-            text-align: left;
-            font-size: 0.9em;
-            line-height: 1.6;
-            position: relative;
-        }
-
-        .instructions-close {
-            position: absolute;
-            top: 15px;
-            right: 15px;
-            background: #334155;
-            border: none;
-            color: #f1f5f9;
-            width: 35px;
-            height: 35px;
-            border-radius: 50%;
-            cursor: pointer;
-            font-size: 1.2em;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-        }
-
-        .instructions-close:hover {
-            background: #475569;
-        }
-
-        .instructions-content h3 {
-            color: #06b6d4;
-            margin-top: 20px;
-            margin-bottom: 10px;
-            font-size: 1.1em;
-        }
-
-        .instructions-content h3:first-of-type {
-            margin-top: 0;
-        }
-
-        .instructions-content ul {
-            margin-left: 20px;
-            margin-bottom: 20px;
-        }
-
-        .instructions-content li {
-            margin: 8px 0;
-            color: #cbd5e1;
-        }
-
-        #landing-screen .card h3 {
-            color: #06b6d4;
-            margin-top: 20px;
-            margin-bottom: 10px;
-            font-size: 1.1em;
-        }
-
-        #landing-screen .card h3:first-of-type {
-            margin-top: 0;
-        }
-
-        #landing-screen .card ul {
-            margin-left: 20px;
-            margin-bottom: 20px;
-        }
-
-        #landing-screen .card li {
-            margin: 8px 0;
-            color: #cbd5e1;
-        }
-
-        .leave-game {
-            position: fixed;
-            top: 20px;
-            right: 20px;
-            background: #334155;
-            color: #94a3b8;
-            border: 2px solid #475569;
-            padding: 8px 16px;
-            font-size: 0.85em;
-            border-radius: 8px;
-            cursor: pointer;
-            transition: all 0.2s;
-            z-index: 1500;
-            width: auto;
-            margin: 0;
-        }
-
-        .leave-game:hover {
-            background: #475569;
-            color: #f1f5f9;
-            transform: none;
-        }
-    </style>
-</head>
-<body>
-    <div id="instructions-modal" class="instructions-modal" onclick="if(event.target === this) toggleInstructions()">
-        <div class="instructions-content">
-            <button class="instructions-close" onclick="toggleInstructions()">✕</button>
-            <h3 style="color: #06b6d4; margin-bottom: 15px; text-align: center;">How to Play</h3>
-
-            <h3>Game Setup</h3>
-            <ul>
-                <li>One person starts a new game and shares the link with teammates</li>
-                <li>Everyone joins the game using the shared link</li>
-                <li>No screen sharing needed - everyone views the game in their own browser</li>
-            </ul>
-
-            <h3>Playing a Round</h3>
-            <ul>
-                <li>Click "It's my turn!" to become the guesser</li>
-                <li>Choose a category (Movies, Animals, Foods, etc.)</li>
-                <li>The guesser has 60 seconds to guess as many words as possible</li>
-                <li>Teammates see the words and give hints over voice/video call</li>
-                <li>Click "Got it!" when the guesser says the correct word</li>
-                <li>Click "Skip" if you're stuck on a word</li>
-            </ul>
-
-            <h3>Scoring</h3>
-            <ul>
-                <li>Each correct guess = 1 point</li>
-                <li>Skips are tracked but don't affect score</li>
-                <li>Scores persist across rounds - highest score wins!</li>
-            </ul>
-        </div>
-    </div>
-
-    <div class="container">
-        <div id="landing-screen" class="screen">
-            <div class="emoji">🧠</div>
-            <h1>Cranium Charades</h1>
-            <div class="card">
-                <p class="text-center mb-20">Real-time multiplayer word-guessing game for remote teams!</p>
-                <button class="btn-primary" onclick="showCreateGame()">Start New Game</button>
-                <button class="btn-secondary" onclick="showJoinGame()">Join Game</button>
-            </div>
-            <div class="card">
-                <h3 style="color: #06b6d4; margin-bottom: 15px; text-align: center;">How to Play</h3>
-
-                <h3>Game Setup</h3>
-                <ul>
-                    <li>One person starts a new game and shares the link with teammates</li>
-                    <li>Everyone joins the game using the shared link</li>
-                    <li>No screen sharing needed - everyone views the game in their own browser</li>
-                </ul>
-
-                <h3>Playing a Round</h3>
-                <ul>
-                    <li>Click "It's my turn!" to become the guesser</li>
-                    <li>Choose a category (Movies, Animals, Foods, etc.)</li>
-                    <li>The guesser has 60 seconds to guess as many words as possible</li>
-                    <li>Teammates see the words and give hints over voice/video call</li>
-                    <li>Click "Got it!" when the guesser says the correct word</li>
-                    <li>Click "Skip" if you're stuck on a word</li>
-                </ul>
-
-                <h3>Scoring</h3>
-                <ul>
-                    <li>Each correct guess = 1 point</li>
-                    <li>Skips are tracked but don't affect score</li>
-                    <li>Scores persist across rounds - highest score wins!</li>
-                </ul>
-            </div>
-        </div>
-
-        <div id="create-game-screen" class="screen">
-            <h1>Create Game</h1>
-            <div class="card">
-                <p class="text-center mb-20">Creating your game...</p>
-                <div id="game-code-display" style="display:none;">
-                    <p class="text-center mb-10">Game Code:</p>
-                    <div class="game-code" id="game-code"></div>
-                    <div class="game-footer" style="margin: 20px 0;">
-                        <div class="game-url" id="share-link"></div>
-                        <button class="copy-icon" onclick="copyShareLink()" title="Copy link">📋</button>
-                    </div>
-                    <div style="margin-top: 20px;">
-                        <input type="text" id="creator-name" placeholder="Enter your name" onkeypress="if(event.key === 'Enter') joinAsCreator()">
-                        <button class="btn-success" onclick="joinAsCreator()">Join Game</button>
-                    </div>
-                </div>
-            </div>
-        </div>
-
-        <div id="join-game-screen" class="screen">
-            <h1>Join Game</h1>
-            <div class="card">
-                <input type="text" id="join-game-code" placeholder="Enter game code" onkeypress="if(event.key === 'Enter') joinGame()">
-                <input type="text" id="join-player-name" placeholder="Enter your name" onkeypress="if(event.key === 'Enter') joinGame()">
-                <button class="btn-primary" onclick="joinGame()">Join</button>
-                <button class="btn-secondary" onclick="showLanding()">Back</button>
-            </div>
-        </div>
-
-        <div id="lobby-screen" class="screen">
-            <button class="leave-game" onclick="leaveGame()">Leave Game</button>
-            <h1>Game Lobby</h1>
-            <div class="game-code-subtitle" id="lobby-game-code"></div>
-            <div class="card">
-                <h2 class="text-center mb-20">Players</h2>
-                <ul class="players-list" id="lobby-players"></ul>
-                <button class="btn-primary" onclick="startRound()">It's my turn!</button>
-            </div>
-            <div class="game-footer">
-                <div class="game-url" id="lobby-game-url"></div>
-                <button class="copy-icon" onclick="copyGameUrl()" title="Copy link">📋</button>
-            </div>
-            <div class="instructions">
-                <button class="instructions-toggle" onclick="toggleInstructions()">How to Play</button>
-            </div>
-        </div>
-
-        <div id="category-selection-screen" class="screen">
-            <h1>Choose Category</h1>
-            <div class="card">
-                <p class="text-center mb-20" id="category-message"></p>
-                <div id="category-grid" class="category-grid"></div>
-                <div id="category-waiting" class="waiting-message" style="display:none;">
-                    Waiting for category selection...
-                </div>
-            </div>
-        </div>
-
-        <div id="ready-screen" class="screen">
-            <h1>Ready?</h1>
-            <div class="card">
-                <p class="text-center mb-20">Category: <strong id="ready-category"></strong></p>
-                <p class="text-center mb-20" id="ready-message"></p>
-                <button class="btn-success" onclick="startTimer()" id="start-button">Start!</button>
-                <div id="ready-waiting" class="waiting-message" style="display:none;">
-                    Waiting for guesser to start...
-                </div>
-            </div>
-        </div>
-
-        <div id="active-round-guesser-screen" class="screen">
-            <button class="leave-game" onclick="endRound()">End Round</button>
-            <h1>Guess the Word!</h1>
-            <div class="card">
-                <div class="timer" id="guesser-timer">60</div>
-                <div class="score">Score: <span id="guesser-score">0</span> | Skips: <span id="guesser-skips">0</span></div>
-                <p class="text-center">Listen to your teammates' hints!</p>
-                <button class="btn-danger" onclick="skipWord()">Skip</button>
-            </div>
-        </div>
-
-        <div id="active-round-hinter-screen" class="screen">
-            <button class="leave-game" onclick="endRound()">End Round</button>
-            <h1>Give Hints!</h1>
-            <div class="card">
-                <div class="timer" id="hinter-timer">60</div>
-                <div class="word-display" id="hinter-word"></div>
-                <div class="score">Score: <span id="hinter-score">0</span> | Skips: <span id="hinter-skips">0</span></div>
-                <button class="btn-success" onclick="correctGuess()">Got it!</button>
-            </div>
-        </div>
-    </div>
-
-    <script>
-        let basePath = window.location.pathname;
-        if (basePath.includes('/game/')) {
-            basePath = basePath.split('/game/')[0];
-        }
-        basePath = basePath.replace(/\/$/, '');
-        const socketPath = basePath + '/socket.io';
-        const socket = io({path: socketPath});
-
-        let currentGameId = null;
-        let currentPlayerId = null;
-        let isGuesser = false;
-        let timerInterval = null;
-
-        function showScreen(screenId) {
-            document.querySelectorAll('.screen').forEach(s => s.classList.remove('active'));
-            document.getElementById(screenId).classList.add('active');
-        }
-
-        function toggleInstructions() {
-            const modal = document.getElementById('instructions-modal');
-            modal.classList.toggle('show');
-        }
-
-        function endRound() {
-            if (timerInterval) {
-                clearInterval(timerInterval);
-                timerInterval = null;
-            }
-            socket.emit('end_round', { game_id: currentGameId });
-        }
-
-        function leaveGame() {
-            localStorage.removeItem('cranium_game_id');
-            localStorage.removeItem('cranium_player_name');
-            currentGameId = null;
-            currentPlayerId = null;
-            lastGuesserId = null;
-            if (timerInterval) {
-                clearInterval(timerInterval);
-                timerInterval = null;
-            }
-            let urlBase = window.location.pathname;
-            if (urlBase.includes('/game/')) {
-                urlBase = urlBase.split('/game/')[0];
-            }
-            urlBase = urlBase.replace(/\/$/, '');
-            const landingUrl = urlBase || '/';
-            history.pushState({}, '', landingUrl);
-            showScreen('landing-screen');
-        }
-
-        function showLanding() {
-            showScreen('landing-screen');
-        }
-
-        function showCreateGame() {
-            showScreen('create-game-screen');
-            socket.emit('create_game');
-        }
-
-        function showJoinGame() {
-            const path = window.location.pathname;
-            if (path.includes('/game/')) {
-                const gameCode = path.split('/game/')[1];
-                document.getElementById('join-game-code').value = gameCode;
-            }
-            showScreen('join-game-screen');
-        }
-
-        function copyShareLink() {
-            const urlElement = document.getElementById('share-link');
-            const originalUrl = urlElement.textContent;
-
-            navigator.clipboard.writeText(originalUrl);
-
-            urlElement.textContent = '✓ Copied to clipboard!';
-            setTimeout(() => {
-                urlElement.textContent = originalUrl;
-            }, 2000);
-        }
-
-        function joinAsCreator() {
-            const name = document.getElementById('creator-name').value.trim();
-            if (!name) {
-                showToast('Please enter your name', 'warning');
-                return;
-            }
-            socket.emit('join_game', {
-                game_id: currentGameId,
-                player_name: name
-            });
-        }
-
-        function joinGame() {
-            const gameCode = document.getElementById('join-game-code').value.trim();
-            const playerName = document.getElementById('join-player-name').value.trim();
-
-            if (!gameCode || !playerName) {
-                showToast('Please enter both game code and your name', 'warning');
-                return;
-            }
-
-            currentGameId = gameCode;
-            socket.emit('join_game', {
-                game_id: gameCode,
-                player_name: playerName
-            });
-        }
-
-        function startRound() {
-            socket.emit('start_round', {
-                game_id: currentGameId,
-                player_id: currentPlayerId
-            });
-        }
-
-        function selectCategory(category) {
-            socket.emit('select_category', {
-                game_id: currentGameId,
-                category: category
-            });
-        }
-
-        function startTimer() {
-            socket.emit('start_timer', {
-                game_id: currentGameId
-            });
-        }
-
-        function correctGuess() {
-            socket.emit('correct_guess', {
-                game_id: currentGameId
-            });
-        }
-
-        function skipWord() {
-            socket.emit('skip_word', {
-                game_id: currentGameId
-            });
-        }
-
-        function updateTimer(timeRemaining) {
-            const seconds = Math.ceil(timeRemaining);
-            const timerElements = document.querySelectorAll('.timer');
-
-            timerElements.forEach(el => {
-                el.textContent = seconds;
-                el.classList.remove('warning', 'danger');
-                if (seconds <= 10) el.classList.add('danger');
-                else if (seconds <= 20) el.classList.add('warning');
-            });
-
-            if (timeRemaining <= 0) {
-                if (timerInterval) clearInterval(timerInterval);
-                socket.emit('end_round', { game_id: currentGameId });
-            }
-        }
+@on_game_event('sync_state')
+def handle_sync_state(sid, data):
+    game_id = data['game_id']
 
-        function showFlash(message, type) {
-            const flash = document.createElement('div');
-            flash.className = `flash-message flash-${type}`;
-            flash.textContent = message;
-            document.body.appendChild(flash);
+    if game_id not in games:
+        game_not_found(sid)
+        return
 
-            setTimeout(() => {
-                flash.remove();
-            }, 1200);
-        }
+    send_to(sid, 'game_state', game_state_json(game_id))
 
-        function showToast(message, type = 'error') {
-            const toast = document.createElement('div');
-            toast.className = `toast toast-${type}`;
-            toast.textContent = message;
-            document.body.appendChild(toast);
+@on_game_event('watch_game')
+def handle_watch_game(sid, data):
+    game_id = data['game_id']
 
-            setTimeout(() => {
-                toast.remove();
-            }, 3000);
-        }
+    if game_id not in games:
+        game_not_found(sid)
+        return
 
-        function copyGameUrl() {
-            const urlElement = document.getElementById('lobby-game-url');
-            const originalUrl = urlElement.textContent;
+    if overloaded():
+        metrics.record_rejection('watch_game', 'lag')
+        send_to(sid, 'error', {'message': 'Server is busy, try again in a moment'})
+        return
 
-            navigator.clipboard.writeText(originalUrl);
+    game = games[game_id]
+    socketio.server.enter_room(sid, spectator_room(game_id), namespace='/')
+    spectated.setdefault(game_id, game.version)
+    socketio.emit('spectator_update', spectator_summary(game), to=sid)
 
-            urlElement.textContent = '✓ Copied to clipboard!';
-            setTimeout(() => {
-                urlElement.textContent = originalUrl;
-            }, 2000);
-        }
+@on_event('disconnect')
+def handle_disconnect():
+    binary_sids.discard(request.sid)
+    rate_limiter.disconnect(request.sid)
+    entry = sid_index.pop(request.sid, None)
+    if entry is None:
+        return
 
-        function editPlayerName(playerId, currentName) {
-            const playersList = document.getElementById('lobby-players');
-            const items = playersList.querySelectorAll('.player-item');
-
-            items.forEach(item => {
-                const nameSpan = item.querySelector('.player-name-editable');
-                if (nameSpan) {
-                    const nameText = nameSpan.textContent.replace(' ✏️', '').trim();
-                    if (nameText === currentName) {
-                        const player = currentGameState.players.find(p => p.player_id === playerId);
-                        item.innerHTML = `
-                            <span style="display: flex; align-items: center; gap: 10px;">
-                                <input type="text" id="edit-name-input" value="${currentName}" onkeypress="if(event.key === 'Enter') savePlayerName('${playerId}')" style="padding: 8px; border-radius: 5px; border: none; font-size: 1em;">
-                                <button onclick="savePlayerName('${playerId}')" style="background: #10b981; color: white; border: none; padding: 8px 12px; border-radius: 5px; cursor: pointer; font-size: 1.2em;">✓</button>
-                            </span>
-                            <span>Score: ${player.score} | Skips: ${player.skips}</span>
-                        `;
-                        const input = document.getElementById('edit-name-input');
-                        input.focus();
-                        input.select();
-                    }
-                }
-            });
-        }
+    game_id, player_id = entry
+    dispatch(game_id, handle_player_left, request.sid, game_id, player_id)
 
-        function savePlayerName(playerId) {
-            const input = document.getElementById('edit-name-input');
-            const newName = input.value.trim();
-
-            if (newName) {
-                socket.emit('rename_player', {
-                    game_id: currentGameId,
-                    player_id: playerId,
-                    new_name: newName
-                });
-            }
-        }
+def handle_player_left(sid, game_id, player_id):
+    game = games.get(game_id)
+    if game is None:
+        return
 
-        let currentGameState = null;
-        let lastGuesserId = null;
-
-        function renderLobby(gameState) {
-            currentGameState = gameState;
-            document.getElementById('lobby-game-code').textContent = gameState.game_id;
-            let urlBase = window.location.pathname;
-            if (urlBase.includes('/game/')) {
-                urlBase = urlBase.split('/game/')[0];
-            }
-            urlBase = urlBase.replace(/\/$/, '');
-            const gameUrl = `${window.location.origin}${urlBase}/game/${gameState.game_id}`;
-            document.getElementById('lobby-game-url').textContent = gameUrl;
-
-            const playersList = document.getElementById('lobby-players');
-            playersList.innerHTML = '';
-
-            const sortedPlayers = [...gameState.players].sort((a, b) => b.score - a.score);
-
-            sortedPlayers.forEach(player => {
-                const li = document.createElement('li');
-                li.className = 'player-item';
-                li.setAttribute('data-player-id', player.player_id);
-
-                if (player.player_id === lastGuesserId) {
-                    li.classList.add('highlight');
-                }
-
-                const isCurrentPlayer = player.player_id === currentPlayerId;
-                const nameDisplay = isCurrentPlayer
-                    ? `<span class="player-name-editable" onclick="editPlayerName('${player.player_id}', '${player.name}')">${player.name} ✏️</span>`
-                    : `<span class="player-name">${player.name}${player.connected ? '' : ' (disconnected)'}</span>`;
-
-                li.innerHTML = `
-                    ${nameDisplay}
-                    <span>Score: ${player.score} | Skips: ${player.skips}</span>
-                `;
-                playersList.appendChild(li);
-            });
-
-            showScreen('lobby-screen');
-        }
+    player = game.players.get(player_id)
+    if player is None or player.sid != sid:
+        return
 
-        socket.on('game_created', (data) => {
-            currentGameId = data.game_id;
-            let urlBase = window.location.pathname;
-            if (urlBase.includes('/game/')) {
-                urlBase = urlBase.split('/game/')[0];
-            }
-            urlBase = urlBase.replace(/\/$/, '');
-            const shareUrl = `${window.location.origin}${urlBase}/game/${data.game_id}`;
-
-            document.getElementById('game-code').textContent = data.game_id;
-            document.getElementById('share-link').textContent = shareUrl;
-            document.getElementById('game-code-display').style.display = 'block';
-        });
-
-        socket.on('joined_game', (data) => {
-            currentPlayerId = data.player_id;
-            currentGameId = data.game_state.game_id;
-            isGuesser = (data.game_state.current_guesser_id === currentPlayerId);
-
-            const player = data.game_state.players.find(p => p.player_id === currentPlayerId);
-            if (player) {
-                localStorage.setItem('cranium_game_id', currentGameId);
-                localStorage.setItem('cranium_player_name', player.name);
-            }
-
-            let urlBase = window.location.pathname;
-            if (urlBase.includes('/game/')) {
-                urlBase = urlBase.split('/game/')[0];
-            }
-            urlBase = urlBase.replace(/\/$/, '');
-            const gameUrl = `${urlBase}/game/${currentGameId}`;
-            if (window.location.pathname !== gameUrl) {
-                history.pushState({}, '', gameUrl);
-            }
-
-            if (data.game_state.state === 'active_round' && !isGuesser) {
-                document.getElementById('hinter-word').textContent = data.current_word || '';
-                document.getElementById('hinter-timer').textContent = Math.ceil(data.game_state.time_remaining || 60);
-                document.getElementById('hinter-score').textContent = data.game_state.round_score;
-                showScreen('active-round-hinter-screen');
-
-                if (timerInterval) clearInterval(timerInterval);
-                const startTime = Date.now() - ((60 - (data.game_state.time_remaining || 60)) * 1000);
-                timerInterval = setInterval(() => {
-                    const elapsed = (Date.now() - startTime) / 1000;
-                    updateTimer(60 - elapsed);
-                }, 100);
-            } else {
-                renderLobby(data.game_state);
-            }
-        });
-
-        socket.on('player_joined', (data) => {
-            if (data.game_state.state === 'lobby') {
-                renderLobby(data.game_state);
-            }
-        });
-
-        socket.on('player_renamed', (data) => {
-            currentGameState = data.game_state;
-
-            const player = data.game_state.players.find(p => p.player_id === data.player_id);
-            if (!player) return;
-
-            if (data.player_id === currentPlayerId) {
-                localStorage.setItem('cranium_player_name', player.name);
-            }
-
-            const listItem = document.querySelector(`[data-player-id="${data.player_id}"]`);
-            if (!listItem) return;
-
-            const isCurrentPlayer = data.player_id === currentPlayerId;
-            if (isCurrentPlayer) {
-                const nameDisplay = `<span class="player-name-editable" onclick="editPlayerName('${player.player_id}', '${player.name}')">${player.name} ✏️</span>`;
-                const scoreDisplay = `<span>Score: ${player.score} | Skips: ${player.skips}</span>`;
-                listItem.innerHTML = `${nameDisplay}${scoreDisplay}`;
-            } else {
-                const nameSpan = listItem.querySelector('.player-name');
-                if (nameSpan) {
-                    nameSpan.textContent = `${player.name}${player.connected ? '' : ' (disconnected)'}`;
-                }
-            }
-        });
-
-        socket.on('round_started', (data) => {
-            lastGuesserId = null;
-            isGuesser = (data.game_state.current_guesser_id === currentPlayerId);
-
-            if (isGuesser) {
-                document.getElementById('category-message').textContent = 'Choose a category:';
-                const grid = document.getElementById('category-grid');
-                grid.innerHTML = '';
-
-                data.game_state.categories.forEach(cat => {
-                    const btn = document.createElement('button');
-                    btn.className = 'btn-primary';
-                    btn.textContent = cat;
-                    btn.onclick = () => selectCategory(cat);
-                    grid.appendChild(btn);
-                });
-
-                document.getElementById('category-grid').style.display = 'grid';
-                document.getElementById('category-waiting').style.display = 'none';
-            } else {
-                document.getElementById('category-message').textContent = `${data.guesser_name} is choosing a category...`;
-                document.getElementById('category-grid').style.display = 'none';
-                document.getElementById('category-waiting').style.display = 'block';
-            }
-
-            showScreen('category-selection-screen');
-        });
-
-        socket.on('category_selected', (data) => {
-            document.getElementById('ready-category').textContent = data.category;
-
-            if (isGuesser) {
-                document.getElementById('ready-message').textContent = "Click Start when you're ready!";
-                document.getElementById('start-button').style.display = 'block';
-                document.getElementById('ready-waiting').style.display = 'none';
-            } else {
-                document.getElementById('ready-message').textContent = 'Get ready to give hints!';
-                document.getElementById('start-button').style.display = 'none';
-                document.getElementById('ready-waiting').style.display = 'block';
-            }
-
-            showScreen('ready-screen');
-        });
-
-        socket.on('timer_started', (data) => {
-            if (isGuesser) {
-                document.getElementById('guesser-score').textContent = '0';
-                document.getElementById('guesser-skips').textContent = '0';
-                document.getElementById('guesser-timer').textContent = '60';
-                showScreen('active-round-guesser-screen');
-            } else {
-                document.getElementById('hinter-word').textContent = data.word;
-                document.getElementById('hinter-score').textContent = '0';
-                document.getElementById('hinter-skips').textContent = '0';
-                document.getElementById('hinter-timer').textContent = '60';
-                showScreen('active-round-hinter-screen');
-            }
-
-            if (timerInterval) clearInterval(timerInterval);
-            const startTime = Date.now();
-            timerInterval = setInterval(() => {
-                const elapsed = (Date.now() - startTime) / 1000;
-                updateTimer(60 - elapsed);
-            }, 100);
-        });
-
-        socket.on('word_changed', (data) => {
-            if (data.action === 'correct') {
-                if (isGuesser) {
-                    showFlash('✓ CORRECT!', 'correct');
-                }
-            } else if (data.action === 'skip') {
-                showFlash('SKIPPED', 'skip');
-            }
-
-            if (!isGuesser) {
-                document.getElementById('hinter-word').textContent = data.word;
-            }
-            document.getElementById('guesser-score').textContent = data.round_score;
-            document.getElementById('hinter-score').textContent = data.round_score;
-
-            if (data.round_skips !== undefined) {
-                document.getElementById('guesser-skips').textContent = data.round_skips;
-                document.getElementById('hinter-skips').textContent = data.round_skips;
-            }
-        });
-
-        socket.on('round_ended', (data) => {
-            if (timerInterval) {
-                clearInterval(timerInterval);
-                timerInterval = null;
-            }
-            lastGuesserId = data.guesser_id;
-            renderLobby(data.game_state);
-        });
-
-        socket.on('error', (data) => {
-            showToast(data.message, 'error');
-            if (data.message === 'Game not found') {
-                localStorage.removeItem('cranium_game_id');
-                localStorage.removeItem('cranium_player_name');
-                showScreen('landing-screen');
-            }
-        });
-
-        const path = window.location.pathname;
-        if (path.includes('/game/')) {
-            const urlGameCode = path.split('/game/')[1];
-            const savedGameId = localStorage.getItem('cranium_game_id');
-            const savedPlayerName = localStorage.getItem('cranium_player_name');
-
-            if (urlGameCode === savedGameId && savedPlayerName) {
-                const attemptRejoin = () => {
-                    if (!currentGameId) {
-                        currentGameId = urlGameCode;
-                        socket.emit('join_game', {
-                            game_id: urlGameCode,
-                            player_name: savedPlayerName
-                        });
-                    }
-                };
-
-                if (socket.connected) {
-                    attemptRejoin();
-                } else {
-                    socket.on('connect', attemptRejoin);
-                }
-            } else {
-                showJoinGame();
-            }
-        } else {
-            showScreen('landing-screen');
-        }
-    </script>
-</body>
-</html>
-"""
+    player.connected = False
+    game.last_activity = datetime.now()
+    log_event(game, 'leave', player_id)
+    broadcast_update(game_id, 'player_left', {
+        'player_name': player.name,
+        'version': bump_version(game),
+        'delta': player_delta(player_id, player, 'connected')
+    })
 
 if __name__ == '__main__':
-    socketio.run(app, host='127.0.0.1', port=8004, debug=True, allow_unsafe_werkzeug=True)
+    # With --debug the reloader runs this file twice: a parent that only watches
+    # for changes and a child that serves. Only the serving process may own the
+    # games, the snapshot and the event log.
+    if not ARGS.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        app.logger.setLevel(logging.INFO)
+        restored, replayed, last_seq = recover_games()
+        app.logger.info('Restored %d games from snapshot, replayed %d logged events', restored, replayed)
+        app.logger.info('Loaded stats for %d words', word_stats.load())
+        if EVENT_LOG_DIR:
+            open_event_log(last_seq)
+        signal.signal(signal.SIGTERM, shutdown)
+        start_background_tasks()
+    if ARGS.async_mode == 'threading':
+        socketio.run(app, host=ARGS.host, port=ARGS.port, debug=ARGS.debug, allow_unsafe_werkzeug=True)
+    else:
+        socketio.run(app, host=ARGS.host, port=ARGS.port, debug=ARGS.debug, log_output=ARGS.debug)
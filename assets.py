@@ -0,0 +1,87 @@
+import gzip
+import hashlib
+import os
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Pages and static files are read, hashed and compressed once at startup and
+# served from memory. Static files are served under a name that carries their
+# content hash, so browsers may keep them for a year and a deploy that changes
+# one changes its URL. Pages keep their URL and are revalidated by ETag instead.
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+CONTENT_TYPES = {
+    '.css': 'text/css; charset=utf-8',
+    '.html': 'text/html; charset=utf-8',
+    '.js': 'text/javascript; charset=utf-8',
+}
+COMPRESS_MIN_BYTES = 256
+
+
+class Asset:
+    __slots__ = ('content_type', 'cache_control', 'etag', 'bodies')
+
+    def __init__(self, body, content_type, cache_control):
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.etag = hashlib.sha256(body).hexdigest()[:16]
+        self.bodies = {'identity': body}
+        if len(body) >= COMPRESS_MIN_BYTES:
+            variants = [('gzip', gzip.compress(body, 9, mtime=0))]
+            if brotli is not None:
+                variants.insert(0, ('br', brotli.compress(body, quality=11)))
+            for encoding, compressed in variants:
+                if len(compressed) < len(body):
+                    self.bodies[encoding] = compressed
+
+    def encoding_for(self, accept_encodings):
+        for encoding in self.bodies:
+            if encoding != 'identity' and accept_encodings[encoding]:
+                return encoding
+        return 'identity'
+
+
+def respond(asset, request):
+    encoding = asset.encoding_for(request.accept_encodings)
+    response = Response(asset.bodies[encoding], content_type=asset.content_type)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = asset.cache_control
+    # Each encoding is a different representation, so it gets its own ETag.
+    response.set_etag(asset.etag if encoding == 'identity' else f'{asset.etag}-{encoding}')
+    return response.make_conditional(request)
+
+
+class StaticAssets:
+    # urls maps a file's path under directory, e.g. 'vendor/socket.io.min.js',
+    # to its hashed name, 'vendor/socket.io.min.3f1c2a9b0d.js'. fallbacks give
+    # a URL to use instead for a file that is not on disk.
+
+    def __init__(self, directory, fallbacks=None):
+        self.urls = {}
+        self.files = {}
+        self.fallbacks = fallbacks or {}
+        for root, _, names in os.walk(directory):
+            for name in sorted(names):
+                stem, ext = os.path.splitext(name)
+                if ext not in CONTENT_TYPES:
+                    continue
+                with open(os.path.join(root, name), 'rb') as f:
+                    asset = Asset(f.read(), CONTENT_TYPES[ext], IMMUTABLE)
+                folder = os.path.relpath(root, directory).replace(os.sep, '/')
+                prefix = '' if folder == '.' else folder + '/'
+                hashed = f'{prefix}{stem}.{asset.etag[:10]}{ext}'
+                self.urls[prefix + name] = hashed
+                self.files[hashed] = asset
+
+    def url(self, name, prefix):
+        if name not in self.urls and name in self.fallbacks:
+            return self.fallbacks[name]
+        return prefix + self.urls[name]
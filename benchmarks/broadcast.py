@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Measure the server-side cost of building and encoding a game_state packet.
+
+Socket.IO encodes a packet once per emit and then writes the same bytes to every
+socket in the room, so the per-broadcast CPU is building the payload and encoding
+it. This times that for growing room sizes in three ways:
+
+* uncached: get_game_state() encoded from scratch, the cost before the cache
+* cached, same version: game_state_json() when the state has not changed, as for
+  a burst of sync_state requests or rejoins after a reconnect
+* cached, new version: game_state_json() right after a change, which pays the one
+  encode per version
+
+    python benchmarks/broadcast.py
+    python benchmarks/broadcast.py --room-sizes 10,1000 --calls 2000
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_app():
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, REPO_ROOT)
+    import app
+    return app
+
+
+def build_room(app, room_size):
+    game_id = app.generate_game_code()
+    records = [['create', game_id]] + [['join', game_id, str(uuid.uuid4()), f'player-{i}'] for i in range(room_size)]
+    for seq, record in enumerate(records, start=1):
+        app.apply_record([seq, *record])
+    return game_id
+
+
+def per_call(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--room-sizes', type=lambda v: [int(x) for x in v.split(',')], default=[1, 10, 100, 1000])
+    parser.add_argument('--calls', type=int, default=5000, help='packets encoded per measurement')
+    args = parser.parse_args()
+
+    app = load_app()
+    dumps = app.metrics.MeteredJSON.dumps
+    separators = (',', ':')
+
+    print(f"{'players':>8}{'uncached':>14}{'cached, same':>16}{'cached, new':>15}")
+    for room_size in args.room_sizes:
+        game_id = build_room(app, room_size)
+        game = app.games[game_id]
+        calls = max(10, args.calls // max(1, room_size // 10))
+
+        def uncached():
+            dumps(['game_state', app.get_game_state(game_id)], separators=separators)
+
+        def cached():
+            dumps(['game_state', app.game_state_json(game_id)], separators=separators)
+
+        def changed():
+            app.bump_version(game)
+            cached()
+
+        results = [per_call(fn, calls) for fn in (uncached, cached, changed)]
+        print(f'{room_size:>8}' + ''.join(f'{seconds * 1e6:>{width}.1f} us'
+                                         for seconds, width in zip(results, (11, 13, 12))))
+
+
+if __name__ == '__main__':
+    main()
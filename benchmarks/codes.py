@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Measure game code allocation cost as the code space fills up.
+
+For each occupancy the allocator is filled to that fraction of its codes, then
+timed on allocate/release pairs so occupancy stays put. For comparison, the old
+approach (draw random codes until one is not taken) is timed against the same
+taken set; its cost grows as 1 / (1 - occupancy).
+
+    python benchmarks/codes.py
+    python benchmarks/codes.py --occupancy 0,0.5,0.99,0.999 --calls 50000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_app():
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, REPO_ROOT)
+    import app
+    return app
+
+
+def time_allocator(codes, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        codes.release(codes.allocate())
+    return (time.perf_counter() - start) / calls
+
+
+def time_retry_loop(app, taken, calls):
+    def generate():
+        while True:
+            code = (f'{random.choice(app.CODE_ADJECTIVES)}-{random.choice(app.CODE_COLORS)}-'
+                    f'{random.choice(app.CODE_NOUNS)}')
+            if code not in taken:
+                return code
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        generate()
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--occupancy', type=lambda v: [float(x) for x in v.split(',')],
+                        default=[0, 0.5, 0.9, 0.99, 0.999])
+    parser.add_argument('--calls', type=int, default=20000, help='timed allocations per occupancy')
+    args = parser.parse_args()
+
+    app = load_app()
+    print(f"{'occupancy':>10}{'taken':>9}{'allocator':>14}{'retry loop':>14}")
+    for occupancy in args.occupancy:
+        codes = app.GameCodes()
+        size = len(codes)
+        taken = {codes.allocate() for _ in range(int(size * occupancy))}
+        allocator = time_allocator(codes, args.calls)
+        retry = time_retry_loop(app, taken, args.calls)
+        print(f'{occupancy:>10.1%}{len(taken):>9,}{allocator * 1e6:>11.2f} us{retry * 1e6:>11.2f} us')
+
+
+if __name__ == '__main__':
+    main()
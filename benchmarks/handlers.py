@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""Microbenchmarks for the Socket.IO handlers in app.py.
+
+Handlers are driven in-process through ``socketio.test_client``, so every call
+goes through the real Socket.IO packet path. Each case is run for every room size
+and every size of the ``games`` dict, in a fresh subprocess so module state never
+leaks between runs. For each run we report ops/sec, transient memory peak per
+call, and memory blocks still held per call.
+
+    python benchmarks/handlers.py                               # print results
+    python benchmarks/handlers.py --save benchmarks/baseline.json
+    python benchmarks/handlers.py --compare benchmarks/baseline.json --threshold 0.2
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CASES = ['join_game', 'correct_guess', 'disconnect', 'get_game_state', 'generate_game_code']
+
+
+def load_app():
+    # One test client replays each handler thousands of times a second.
+    os.environ['CRANIUM_RATE_LIMITS'] = 'off'
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, REPO_ROOT)
+    import app
+    return app
+
+
+def socket_sid(app, client):
+    return app.socketio.server.manager.sid_from_eio_sid(client.eio_sid, '/')
+
+
+def build_room(app, room_size):
+    server = app.socketio.server
+    creator = app.socketio.test_client(app.app)
+    creator.emit('create_game')
+    game_id = creator.get_received()[0]['args'][0]['game_id']
+    clients = []
+    player_ids = []
+    for index in range(room_size):
+        client = creator if index == 0 else app.socketio.test_client(app.app)
+        client.emit('join_game', {'game_id': game_id, 'player_name': f'player-{index}'})
+        player_ids.append(client.get_received()[0]['args'][0]['player_id'])
+        # Step out of the room while it is being built so setup does not pay
+        # for O(n^2) player_joined deliveries, then put everyone back.
+        server.leave_room(socket_sid(app, client), game_id)
+        clients.append(client)
+    for client in clients:
+        server.enter_room(socket_sid(app, client), game_id)
+    return game_id, clients, player_ids
+
+
+def fill_games(app, game_count):
+    for _ in range(game_count):
+        app.create_game()
+
+
+def drain(clients):
+    for client in clients:
+        client.get_received()
+
+
+def case_join_game(app, room_size):
+    game_id, clients, _ = build_room(app, room_size)
+    # Rejoin as the most recently added player, the worst case for a name lookup.
+    joiner = clients[-1]
+    payload = {'game_id': game_id, 'player_name': f'player-{room_size - 1}'}
+
+    def prepare(n):
+        drain(clients)
+        return [lambda: joiner.emit('join_game', payload)] * n
+    return prepare
+
+
+def case_correct_guess(app, room_size):
+    game_id, clients, player_ids = build_room(app, room_size)
+    guesser = clients[0]
+    guesser.emit('start_round', {'game_id': game_id, 'player_id': player_ids[0]})
+    guesser.emit('select_category', {'game_id': game_id, 'category': 'Movies'})
+    guesser.emit('start_timer', {'game_id': game_id})
+    game = app.games[game_id]
+    game.timer_duration = 10 ** 9
+    hinter = clients[-1]
+    payload = {'game_id': game_id}
+
+    def call():
+        # Bypass the 0.3s double-click guard so every call scores.
+        game.last_word_change = None
+        hinter.emit('correct_guess', payload)
+
+    def prepare(n):
+        drain(clients)
+        return [call] * n
+    return prepare
+
+
+def case_disconnect(app, room_size):
+    game_id, clients, _ = build_room(app, room_size)
+    counter = [0]
+    leavers = []
+
+    def prepare(n):
+        drain(clients)
+        if not n:
+            return []
+        # The test client keeps a class-level registry of every client it has
+        # made; forget the ones that already left before making more.
+        for client in leavers:
+            type(client).clients.pop(client.eio_sid, None)
+        leavers.clear()
+        for _ in range(n):
+            client = app.socketio.test_client(app.app)
+            client.emit('join_game', {'game_id': game_id, 'player_name': f'leaver-{counter[0]}'})
+            client.get_received()
+            counter[0] += 1
+            leavers.append(client)
+        drain(clients)
+        return [client.disconnect for client in leavers]
+    return prepare
+
+
+def case_get_game_state(app, room_size):
+    game_id, _, _ = build_room(app, room_size)
+    return lambda n: [lambda: app.get_game_state(game_id)] * n
+
+
+def case_generate_game_code(app, room_size):
+    # Release each code again so the run never exhausts the code space.
+    return lambda n: [lambda: app.game_codes.release(app.generate_game_code())] * n
+
+
+def measure(prepare, min_time, batch, alloc_samples):
+    calls = 0
+    elapsed = 0.0
+    size = 1
+    while elapsed < min_time:
+        thunks = prepare(size)
+        start = time.perf_counter()
+        for thunk in thunks:
+            thunk()
+        elapsed += time.perf_counter() - start
+        calls += len(thunks)
+        # Size the next batch to the remaining time so slow cases stay quick.
+        remaining = min_time - elapsed
+        size = max(1, min(batch, int(remaining / (elapsed / calls)) + 1))
+
+    alloc_samples = min(alloc_samples, calls)
+    thunks = prepare(alloc_samples)
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    peaks = []
+    for thunk in thunks:
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        thunk()
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+    del thunks
+    # prepare(0) only drops the messages the test clients queued, so they are
+    # not counted as retained.
+    prepare(0)
+    gc.collect()
+    blocks_after = sys.getallocatedblocks()
+
+    return {
+        'ops_per_sec': round(calls / elapsed, 1),
+        'peak_bytes_per_call': round(sum(peaks) / len(peaks)),
+        'retained_blocks_per_call': round((blocks_after - blocks_before) / alloc_samples, 2),
+        'calls': calls,
+    }
+
+
+def run_case(name, room_size, game_count, min_time, batch, alloc_samples):
+    app = load_app()
+    fill_games(app, game_count)
+    prepare = globals()[f'case_{name}'](app, room_size)
+    return measure(prepare, min_time, batch, alloc_samples)
+
+
+def case_key(name, room_size, game_count):
+    return f'{name}[players={room_size},games={game_count}]'
+
+
+def run_all(args):
+    results = {}
+    for name in args.cases:
+        # Code generation does not touch a room, so only the games axis matters.
+        room_sizes = [0] if name == 'generate_game_code' else args.room_sizes
+        for room_size in room_sizes:
+            for game_count in args.game_counts:
+                cmd = [sys.executable, os.path.abspath(__file__), '--run-case', name,
+                       '--room-sizes', str(room_size), '--game-counts', str(game_count),
+                       '--min-time', str(args.min_time), '--batch', str(args.batch),
+                       '--alloc-samples', str(args.alloc_samples)]
+                output = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                key = case_key(name, room_size, game_count)
+                results[key] = result
+                print(f"{key:<52}{result['ops_per_sec']:>12,.0f} ops/s"
+                      f"{result['peak_bytes_per_call']:>10,} B peak{result['retained_blocks_per_call']:>9} blocks",
+                      flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        before = baseline[key]['ops_per_sec']
+        change = (result['ops_per_sec'] - before) / before
+        if change < -threshold:
+            regressions.append((key, before, result['ops_per_sec'], change))
+    for key, before, after, change in regressions:
+        print(f'REGRESSION {key}: {before:,.0f} -> {after:,.0f} ops/s ({change:+.0%})')
+    return regressions
+
+
+def int_list(value):
+    return [int(v) for v in value.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cases', type=lambda v: v.split(','), default=CASES)
+    parser.add_argument('--room-sizes', type=int_list, default=[1, 10, 100, 1000])
+    parser.add_argument('--game-counts', type=int_list, default=[0, 10000])
+    parser.add_argument('--min-time', type=float, default=0.5, help='seconds of timed calls per case')
+    parser.add_argument('--batch', type=int, default=200)
+    parser.add_argument('--alloc-samples', type=int, default=50)
+    parser.add_argument('--save', help='write results to this JSON baseline')
+    parser.add_argument('--compare', help='fail if ops/sec regress against this JSON baseline')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed ops/sec drop, as a fraction')
+    parser.add_argument('--run-case', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        result = run_case(args.run_case, args.room_sizes[0], args.game_counts[0],
+                          args.min_time, args.batch, args.alloc_samples)
+        print(json.dumps(result))
+        return
+
+    results = run_all(args)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""Drive full Cranium Charades rooms against a local server and report latencies.
+
+Each room gets one guesser and N-1 hinters. They walk through the real event flow:
+create_game, join_game, start_round, select_category, start_timer, a burst of
+correct_guess/skip_word, and end_round. For every event we record the sender's
+round trip (emit -> the sender receives the reply) and the broadcast fan-out
+(emit -> the last player in the room receives it).
+
+    python benchmarks/loadtest.py --spawn --rooms 50 --players 10
+    python benchmarks/loadtest.py --url http://127.0.0.1:8004 --server-pid 1234
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from urllib.parse import urlparse
+
+import socketio
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+LOCAL_HOSTS = {'127.0.0.1', 'localhost', '::1'}
+# With CRANIUM_COALESCE_INTERVAL set, the server batches joins into room_update.
+PRESENCE_EVENTS = {'player_joined', 'room_update'}
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Player:
+    def __init__(self, url, path, timeout):
+        self.url = url
+        self.path = path
+        self.timeout = timeout
+        self.client = socketio.AsyncClient(reconnection=False)
+        self.inbox = defaultdict(asyncio.Queue)
+        self.player_id = None
+        self.client.on('*', self._record)
+
+    async def _record(self, event, data=None):
+        if event in PRESENCE_EVENTS:
+            event = 'presence'
+        self.inbox[event].put_nowait((time.perf_counter(), data))
+
+    async def connect(self):
+        await self.client.connect(self.url, socketio_path=self.path, transports=['websocket'])
+
+    async def expect(self, event):
+        return await asyncio.wait_for(self.inbox[event].get(), self.timeout)
+
+    def drain(self):
+        for queue in self.inbox.values():
+            while not queue.empty():
+                queue.get_nowait()
+
+
+class Stats:
+    def __init__(self):
+        self.rtt = defaultdict(list)
+        self.fanout = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def summary(self):
+        events = sorted(set(self.rtt) | set(self.fanout) | set(self.errors))
+        return {event: {
+            'count': len(self.rtt[event]),
+            'errors': self.errors[event],
+            'rtt_ms': percentiles(self.rtt[event]),
+            'fanout_ms': percentiles(self.fanout[event]),
+        } for event in events}
+
+
+def percentiles(samples):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+
+    return {'p50': pick(0.50), 'p95': pick(0.95), 'p99': pick(0.99),
+            'max': round(ordered[-1] * 1000, 2), 'mean': round(statistics.fmean(ordered) * 1000, 2)}
+
+
+async def timed(stats, name, sender, payload, reply, others=(), broadcast=None):
+    start = time.perf_counter()
+    try:
+        await sender.client.emit(name, payload)
+        arrived, data = await sender.expect(reply)
+        stats.rtt[name].append(arrived - start)
+        if others:
+            arrivals = await asyncio.gather(*(p.expect(broadcast or reply) for p in others))
+            stats.fanout[name].append(max(a for a, _ in arrivals) - start)
+        return data
+    except asyncio.TimeoutError:
+        stats.errors[name] += 1
+        for player in (sender, *others):
+            player.drain()
+        return None
+
+
+async def run_room(args, stats, room_index):
+    players = [Player(args.url, args.path, args.timeout) for _ in range(args.players)]
+    await asyncio.sleep(room_index * args.ramp)
+    await asyncio.gather(*(p.connect() for p in players))
+
+    guesser, hinters = players[0], players[1:]
+    created = await timed(stats, 'create_game', guesser, None, 'game_created')
+    if created is None:
+        return players
+    game_id = created['game_id']
+
+    for index, player in enumerate(players):
+        joined = await timed(stats, 'join_game', player, {'game_id': game_id, 'player_name': f'load-{room_index}-{index}'},
+                             'joined_game', players[:index], broadcast='presence')
+        if joined:
+            player.player_id = joined['player_id']
+
+    for _ in range(args.rounds):
+        await timed(stats, 'start_round', guesser, {'game_id': game_id, 'player_id': guesser.player_id},
+                    'round_started', hinters)
+        await timed(stats, 'select_category', guesser, {'game_id': game_id, 'category': args.category},
+                    'category_selected', hinters)
+        started = await timed(stats, 'start_timer', guesser, {'game_id': game_id}, 'timer_started', hinters)
+        word_seq = started['game_state']['word_seq'] if started else None
+
+        for burst in range(args.guesses):
+            await asyncio.sleep(args.interval)
+            # Clicks name the word they were made on, like the browser client does.
+            payload = {'game_id': game_id, 'word_seq': word_seq}
+            if args.skip_every and burst % args.skip_every == args.skip_every - 1:
+                changed = await timed(stats, 'skip_word', guesser, payload, 'word_changed', hinters)
+            else:
+                hinter = hinters[burst % len(hinters)] if hinters else guesser
+                others = [p for p in players if p is not hinter]
+                changed = await timed(stats, 'correct_guess', hinter, payload, 'word_changed', others)
+            if changed:
+                word_seq = changed['delta']['word_seq']
+
+        await timed(stats, 'end_round', guesser, {'game_id': game_id}, 'round_ended', hinters)
+
+    return players
+
+
+async def sample_server(pid, samples, stop):
+    process = psutil.Process(pid)
+    process.cpu_percent()
+    while not stop.is_set():
+        await asyncio.sleep(0.5)
+        samples.append((process.cpu_percent(), process.memory_info().rss))
+
+
+async def run(args):
+    stats = Stats()
+    samples = []
+    stop = asyncio.Event()
+    sampler = None
+    if args.server_pid and psutil:
+        sampler = asyncio.create_task(sample_server(args.server_pid, samples, stop))
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(run_room(args, stats, i) for i in range(args.rooms)), return_exceptions=True)
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    if sampler:
+        await sampler
+
+    failures = [r for r in results if isinstance(r, BaseException)]
+    for players in results:
+        if not isinstance(players, BaseException):
+            await asyncio.gather(*(p.client.disconnect() for p in players))
+
+    report = {
+        'rooms': args.rooms,
+        'players_per_room': args.players,
+        'rounds': args.rounds,
+        'elapsed_s': round(elapsed, 2),
+        'failed_rooms': len(failures),
+        'events': stats.summary(),
+    }
+    if samples:
+        cpu = [c for c, _ in samples]
+        rss = [r for _, r in samples]
+        report['server'] = {
+            'cpu_percent_mean': round(statistics.fmean(cpu), 1),
+            'cpu_percent_max': round(max(cpu), 1),
+            'rss_mib_max': round(max(rss) / 2 ** 20, 1),
+        }
+    if failures:
+        report['first_failure'] = repr(failures[0])
+    return report
+
+
+def print_report(report):
+    print(f"{report['rooms']} rooms x {report['players_per_room']} players, "
+          f"{report['rounds']} round(s) each, {report['elapsed_s']}s, {report['failed_rooms']} failed room(s)")
+    if 'first_failure' in report:
+        print(f"  first failure: {report['first_failure']}")
+    print(f"{'event':<16}{'count':>7}{'err':>5}   {'rtt p50/p95/p99 ms':<24}{'fan-out p50/p95/p99 ms':<24}")
+    for event, row in report['events'].items():
+        def fmt(p):
+            return f"{p['p50']}/{p['p95']}/{p['p99']}" if p else '-'
+        print(f"{event:<16}{row['count']:>7}{row['errors']:>5}   {fmt(row['rtt_ms']):<24}{fmt(row['fanout_ms']):<24}")
+    if 'server' in report:
+        server = report['server']
+        print(f"server: cpu mean {server['cpu_percent_mean']}% max {server['cpu_percent_max']}%, "
+              f"rss max {server['rss_mib_max']} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8004')
+    parser.add_argument('--path', default='socket.io', help='Socket.IO path on the server')
+    parser.add_argument('--rooms', type=int, default=10)
+    parser.add_argument('--players', type=int, default=5, help='players per room, including the guesser')
+    parser.add_argument('--rounds', type=int, default=1)
+    parser.add_argument('--guesses', type=int, default=20, help='word changes per round')
+    parser.add_argument('--skip-every', type=int, default=4, help='make every Nth word change a skip (0 disables)')
+    parser.add_argument('--interval', type=float, default=0.35, help='seconds between word changes in a room')
+    parser.add_argument('--category', default='Movies')
+    parser.add_argument('--ramp', type=float, default=0.01, help='seconds between starting successive rooms')
+    parser.add_argument('--timeout', type=float, default=10.0)
+    parser.add_argument('--server-pid', type=int, help='sample CPU and RSS of this server process')
+    parser.add_argument('--spawn', action='store_true', help='start app.py in gevent mode on --url for the run')
+    parser.add_argument('--json', dest='json_path', help='also write the report to this file')
+    args = parser.parse_args()
+
+    url = urlparse(args.url)
+    if url.hostname not in LOCAL_HOSTS:
+        parser.error('load tests only run against localhost')
+    if args.server_pid and psutil is None:
+        print('psutil is not installed; skipping server CPU/RSS sampling', file=sys.stderr)
+
+    server = None
+    if args.spawn:
+        server = subprocess.Popen([sys.executable, 'app.py', '--async-mode', 'gevent', '--no-debug',
+                                   '--host', url.hostname, '--port', str(url.port or 80)], cwd=REPO_ROOT,
+                                  # Every simulated player shares one IP, so per-IP limits would throttle the run.
+                                  # Persistence is off so the synthetic games and clicks never reach the
+                                  # snapshot, event log or word stats the next real start loads.
+                                  env={**os.environ, 'CRANIUM_RATE_LIMITS': 'off', 'CRANIUM_SNAPSHOT_PATH': '',
+                                       'CRANIUM_EVENT_LOG_DIR': '', 'CRANIUM_WORD_STATS_PATH': ''})
+        args.server_pid = server.pid
+        time.sleep(2)
+
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
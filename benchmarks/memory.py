@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Measure how much memory game state costs per room.
+
+Rooms are built by feeding synthetic records to ``apply_record``, the same path
+startup recovery uses, so the numbers cover exactly what the server keeps per game
+and per player. Sockets and Socket.IO bookkeeping are not included. Two shapes are
+measured:
+
+* idle: a lobby whose players have all disconnected
+* active: a round in progress with --words word changes drawn from one deck
+
+    python benchmarks/memory.py                      # 10,000 rooms of 5 players
+    python benchmarks/memory.py --rooms 50000 --players 10 --json memory.json
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_app():
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, REPO_ROOT)
+    import app
+    return app
+
+
+def build_rooms(app, rooms, players, words, active):
+    seq = 0
+
+    def apply(kind, game_id, *fields):
+        nonlocal seq
+        seq += 1
+        app.apply_record([seq, kind, game_id, *fields])
+
+    category = next(iter(app.WORDS))
+    for _ in range(rooms):
+        game_id = app.generate_game_code()
+        apply('create', game_id)
+        player_ids = [str(uuid.uuid4()) for _ in range(players)]
+        for index, player_id in enumerate(player_ids):
+            apply('join', game_id, player_id, f'player-{index}')
+        if not active:
+            continue
+        apply('start_round', game_id, player_ids[0])
+        apply('category', game_id, category)
+        apply('timer', game_id, time.time(), app.WORDS[category][0])
+        # Draw through the deck like live play does, so the deck is allocated.
+        for _ in range(words):
+            apply('correct', game_id, app.get_next_word(game_id))
+
+
+def measure(app, rooms, players, words, active):
+    app.games.clear()
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    build_rooms(app, rooms, players, words, active)
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    total = after - before
+    return {
+        'rooms': rooms,
+        'players_per_room': players,
+        'total_mib': round(total / 2 ** 20, 2),
+        'bytes_per_room': round(total / rooms),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rooms', type=int, default=10000)
+    parser.add_argument('--players', type=int, default=5, help='players per room')
+    parser.add_argument('--words', type=int, default=10, help='word changes per active room')
+    parser.add_argument('--json', dest='json_path', help='also write the results to this file')
+    args = parser.parse_args()
+
+    app = load_app()
+    results = {
+        'idle': measure(app, args.rooms, args.players, args.words, active=False),
+        'active': measure(app, args.rooms, args.players, args.words, active=True),
+    }
+    for shape, result in results.items():
+        print(f"{shape:<8}{result['rooms']:>8,} rooms x {result['players_per_room']} players"
+              f"{result['total_mib']:>10,.2f} MiB{result['bytes_per_room']:>10,} B/room")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
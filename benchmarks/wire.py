@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Compare the JSON and MessagePack wire formats per event.
+
+For a few representative events this reports the bytes a websocket carries
+(Socket.IO packet text for JSON, the packet header plus the binary attachment for
+MessagePack) and the server's encode time for each format. If node is on PATH, it
+also times the browser-side decode: JSON.parse against the MessagePack decoder
+in static/app.js.
+
+    python benchmarks/wire.py
+    python benchmarks/wire.py --calls 20000 --json wire.json
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+from socketio import packet
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_app():
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, REPO_ROOT)
+    import app
+    return app
+
+
+def build_room(app, room_size):
+    game_id = app.generate_game_code()
+    player_ids = [str(uuid.uuid4()) for _ in range(room_size)]
+    records = [['create', game_id]] + [['join', game_id, pid, f'player-{i}'] for i, pid in enumerate(player_ids)]
+    records += [['start_round', game_id, player_ids[0]], ['category', game_id, 'Movies'],
+                ['timer', game_id, time.time(), app.WORDS['Movies'][0]]]
+    for seq, record in enumerate(records, start=1):
+        app.apply_record([seq, *record])
+    return game_id, player_ids
+
+
+def sample_events(app):
+    game_id, player_ids = build_room(app, 10)
+    big_id, _ = build_room(app, 100)
+    game = app.games[game_id]
+    player = game.players[player_ids[-1]]
+    return {
+        'word_changed': {'word': 'Raiders of the Lost Ark', 'action': 'correct', 'version': 42,
+                         'delta': {'round_score': 7, 'word_seq': 12}},
+        'player_joined': {'player_name': player.name, 'version': 43,
+                          'delta': app.player_delta(player_ids[-1], player, 'name', 'score', 'skips', 'connected')},
+        'round_ended': {'final_score': 7, 'final_skips': 2, 'guesser_id': player_ids[0], 'version': 44,
+                        'delta': {'state': 'lobby', 'time_remaining': None,
+                                  'players': {player_ids[0]: {'score': 7, 'skips': 2}}}},
+        'game_state[10]': app.get_game_state(game_id),
+        'game_state[100]': app.get_game_state(big_id),
+    }
+
+
+def wire_bytes(app, event, payload, binary):
+    data = app.wire.encode(payload) if binary else payload
+    encoded = packet.Packet(packet.EVENT, data=[event.split('[')[0], data], namespace='/').encode()
+    if isinstance(encoded, list):
+        # Header text frame plus one binary frame; engine.io adds a '4' to text only.
+        return 1 + len(encoded[0].encode()) + len(encoded[1])
+    return 1 + len(encoded.encode())
+
+
+def per_call(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls
+
+
+def node_decode_times(app, events, calls):
+    node = shutil.which('node')
+    if node is None:
+        return None
+    with open(os.path.join(REPO_ROOT, 'static', 'app.js')) as f:
+        decoder = re.search(r'(function decodeMsgpack.*?\n}\n)', f.read(), re.S).group(1)
+    samples = {name: {'json': json.dumps(payload), 'msgpack': list(app.wire.encode(payload))}
+               for name, payload in events.items()}
+    script = decoder + f"""
+const wireKeys = {json.dumps(list(app.wire.KEYS))};
+const samples = {json.dumps(samples)};
+const calls = {calls};
+const results = {{}};
+for (const [name, sample] of Object.entries(samples)) {{
+    const buffer = new Uint8Array(sample.msgpack).buffer;
+    for (let i = 0; i < calls; i++) {{
+        JSON.parse(sample.json);
+        decodeMsgpack(buffer);
+    }}
+    let start = process.hrtime.bigint();
+    for (let i = 0; i < calls; i++) JSON.parse(sample.json);
+    const json = Number(process.hrtime.bigint() - start) / calls / 1e3;
+    start = process.hrtime.bigint();
+    for (let i = 0; i < calls; i++) decodeMsgpack(buffer);
+    const msgpack = Number(process.hrtime.bigint() - start) / calls / 1e3;
+    results[name] = {{json, msgpack}};
+}}
+console.log(JSON.stringify(results));
+"""
+    with tempfile.NamedTemporaryFile('w', suffix='.js', delete=False) as f:
+        f.write(script)
+    try:
+        output = subprocess.run([node, f.name], check=True, capture_output=True, text=True).stdout
+    finally:
+        os.unlink(f.name)
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=5000, help='encodes/decodes timed per event and format')
+    parser.add_argument('--json', dest='json_path', help='also write the results to this file')
+    args = parser.parse_args()
+
+    app = load_app()
+    if not app.wire.available():
+        sys.exit('msgpack is not installed')
+    events = sample_events(app)
+    dumps = app.metrics.MeteredJSON.dumps
+    decode_times = node_decode_times(app, events, args.calls)
+
+    results = {}
+    for name, payload in events.items():
+        results[name] = {
+            'json_bytes': wire_bytes(app, name, payload, binary=False),
+            'msgpack_bytes': wire_bytes(app, name, payload, binary=True),
+            'json_encode_us': round(per_call(lambda: dumps(['x', payload], separators=(',', ':')), args.calls) * 1e6, 2),
+            'msgpack_encode_us': round(per_call(lambda: app.wire.encode(payload), args.calls) * 1e6, 2),
+        }
+        if decode_times:
+            results[name]['json_decode_us'] = round(decode_times[name]['json'], 2)
+            results[name]['msgpack_decode_us'] = round(decode_times[name]['msgpack'], 2)
+
+    print(f"{'event':<18}{'bytes json/msgpack':>20}{'encode us json/msgpack':>25}{'decode us json/msgpack':>25}")
+    for name, row in results.items():
+        decode = f"{row['json_decode_us']}/{row['msgpack_decode_us']}" if 'json_decode_us' in row else '-'
+        print(f"{name:<18}{row['json_bytes']:>11}/{row['msgpack_bytes']:<8}"
+              f"{row['json_encode_us']:>16}/{row['msgpack_encode_us']:<8}{decode:>25}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Measure word draw cost as categories grow.
+
+For each category size this fills a synthetic category with random guess and
+skip history, then times a draw with 20 words already used this round for the
+'normal' per-game deck (steady state, and the first draw of a game, which builds
+the deck) and for the 'easy' and 'hard' alias tables. 'table' is the alias draw
+alone, without the check against the round's used-words bitmap. It also reports
+how long rebuilding a category's tables takes; that happens in the background,
+never on a draw.
+
+    python benchmarks/words.py
+    python benchmarks/words.py --sizes 100,1000000 --calls 50000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_app():
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, REPO_ROOT)
+    import app
+    return app
+
+
+def per_call(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls
+
+
+def synthetic_stats(app, size):
+    stats = app.wordstats.WordStats({'Synthetic': [f'word-{i}' for i in range(size)]})
+    for word in range(size):
+        for _ in range(random.randrange(4)):
+            correct = random.random() < 0.7
+            stats.record('Synthetic', word, correct, random.uniform(2, 20) if correct else 0.0)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=lambda v: [int(x) for x in v.split(',')],
+                        default=[50, 1000, 100000, 1000000])
+    parser.add_argument('--calls', type=int, default=20000, help='timed draws per size and mode')
+    args = parser.parse_args()
+
+    app = load_app()
+    print(f"{'words':>10}{'deck':>12}{'new deck':>14}{'table':>12}{'easy':>12}{'hard':>12}{'rebuild':>14}")
+    for size in args.sizes:
+        stats = synthetic_stats(app, size)
+        used = bytearray((size + 7) >> 3)
+        for word in random.sample(range(size), min(20, size // 2)):
+            used[word >> 3] |= 1 << (word & 7)
+
+        deck = app.WordDeck(size)
+        deck_draw = per_call(lambda: deck.draw(used), args.calls)
+        new_deck = per_call(lambda: app.WordDeck(size).draw(used), max(1, args.calls // size))
+        table = per_call(stats.tables['Synthetic']['easy'].draw, args.calls)
+        easy = per_call(lambda: stats.draw('Synthetic', 'easy', used), args.calls)
+        hard = per_call(lambda: stats.draw('Synthetic', 'hard', used), args.calls)
+        rebuild = per_call(lambda: stats.rebuild('Synthetic'), 1)
+        print(f'{size:>10,}{deck_draw * 1e6:>9.2f} us{new_deck * 1e6:>11.0f} us'
+              f'{table * 1e6:>9.2f} us{easy * 1e6:>9.2f} us{hard * 1e6:>9.2f} us{rebuild * 1e3:>11.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
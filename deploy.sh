@@ -12,6 +12,13 @@ echo "📦 Updating dependencies..."
 source venv/bin/activate
 pip install -r requirements.txt
 
+# The page serves its own copy of the socket.io client; fetch it once if the
+# checkout does not have it yet.
+if [ ! -f static/vendor/socket.io.min.js ]; then
+    echo "📦 Vendoring socket.io client..."
+    curl -fsSL --create-dirs -o static/vendor/socket.io.min.js https://cdn.socket.io/4.8.1/socket.io.min.js
+fi
+
 echo "🔧 Updating Caddy configuration..."
 sudo ~/infrastructure/deploy.sh caddy
 
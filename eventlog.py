@@ -0,0 +1,100 @@
+import itertools
+import json
+import os
+from collections import deque
+
+import native
+
+SEGMENT_PREFIX = 'events-'
+SEGMENT_SUFFIX = '.log'
+
+
+def segment_paths(directory):
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(name for name in os.listdir(directory)
+                   if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX))
+    return [os.path.join(directory, name) for name in names]
+
+
+def read_records(directory):
+    for path in segment_paths(directory):
+        with open(path) as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    # A torn final write from a crash; everything before it is intact.
+                    break
+                yield json.loads(line)
+
+
+class EventLog:
+    # Handlers only append a record to an in-memory deque. A native writer thread
+    # drains the deque every flush_interval seconds, writes one JSON array per
+    # line, and fsyncs once per batch. When a segment passes max_bytes it is
+    # rotated, and only the newest keep_segments are kept.
+
+    def __init__(self, directory, flush_interval=1.0, max_bytes=16 * 2 ** 20, keep_segments=8, last_seq=0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.keep_segments = keep_segments
+        self.pending = deque()
+        self.seq = itertools.count(last_seq + 1)
+        self.file = None
+        self.closed = False
+        self.lock = native.allocate_lock()
+        self.stats = {'records': 0, 'batches': 0, 'bytes': 0, 'rotations': 0}
+        os.makedirs(directory, exist_ok=True)
+
+    def append(self, record):
+        seq = next(self.seq)
+        self.pending.append([seq] + record)
+        return seq
+
+    def start(self):
+        native.start_thread(self._run, ())
+
+    def _run(self):
+        while not self.closed:
+            native.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            return self._flush()
+
+    def _flush(self):
+        if not self.pending:
+            return 0
+        lines = []
+        while self.pending:
+            lines.append(json.dumps(self.pending.popleft(), separators=(',', ':')))
+        data = '\n'.join(lines) + '\n'
+
+        if self.file is None or self.file.tell() >= self.max_bytes:
+            self._rotate(lines[0])
+        self.file.write(data)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+        self.stats['records'] += len(lines)
+        self.stats['batches'] += 1
+        self.stats['bytes'] += len(data)
+        return len(lines)
+
+    def _rotate(self, first_line):
+        if self.file is not None:
+            self.file.close()
+            self.stats['rotations'] += 1
+        first_seq = json.loads(first_line)[0]
+        path = os.path.join(self.directory, f'{SEGMENT_PREFIX}{first_seq:012d}{SEGMENT_SUFFIX}')
+        self.file = open(path, 'a')
+        for old in segment_paths(self.directory)[:-self.keep_segments]:
+            os.remove(old)
+
+    def close(self):
+        self.closed = True
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
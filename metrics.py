@@ -0,0 +1,171 @@
+import bisect
+import json
+import time
+import uuid
+
+# Recording happens on every handler call and every emit, so nothing here takes a
+# lock. Under gevent that is exact. Under threading mode, two threads can very
+# occasionally race on the same counter and lose an increment, which is fine for
+# monitoring.
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'total')
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+
+
+handler_latency = {}
+mailbox_wait = Histogram()
+emitted = {}
+dropped = {}
+rejected = {}
+counters = {}
+started_at = time.time()
+
+
+def histogram_for(event):
+    return handler_latency.setdefault(event, Histogram())
+
+
+def record_emit(event, size):
+    stats = emitted.get(event)
+    if stats is None:
+        stats = emitted.setdefault(event, [0, 0])
+    stats[0] += 1
+    stats[1] += size
+
+
+def record_attachment(event, size):
+    # Binary attachments bypass dumps; their packet was already counted there.
+    stats = emitted.get(event)
+    if stats is not None:
+        stats[1] += size
+
+
+def record_drop(event, scope):
+    key = (event, scope)
+    dropped[key] = dropped.get(key, 0) + 1
+
+
+def record_rejection(event, reason):
+    key = (event, reason)
+    rejected[key] = rejected.get(key, 0) + 1
+
+
+def increment(name, amount=1):
+    counters[name] = counters.get(name, 0) + amount
+
+
+class RawJSON:
+    # Already-encoded JSON that MeteredJSON.dumps splices into a packet verbatim.
+    __slots__ = ('text',)
+
+    def __init__(self, text):
+        self.text = text
+
+
+# The nonce keeps a player-chosen string from ever matching the placeholder.
+_RAW_PLACEHOLDER = f'\x00raw-json-{uuid.uuid4().hex}'
+_RAW_PLACEHOLDER_ENCODED = json.dumps(_RAW_PLACEHOLDER)
+
+
+class MeteredJSON:
+    # Socket.IO encodes each event packet exactly once, even for room broadcasts,
+    # by calling dumps([event, payload]). Counting there gives per-event emit
+    # counts and bytes without encoding anything a second time.
+
+    @staticmethod
+    def dumps(obj, **kwargs):
+        raw = []
+
+        def splice(value):
+            if type(value) is not RawJSON:
+                raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+            raw.append(value.text)
+            return _RAW_PLACEHOLDER
+
+        text = json.dumps(obj, default=splice, **kwargs)
+        if raw:
+            parts = text.split(_RAW_PLACEHOLDER_ENCODED)
+            text = ''.join(part + fragment for part, fragment in zip(parts, raw)) + parts[-1]
+        if type(obj) is list and obj and type(obj[0]) is str:
+            record_emit(obj[0], len(text))
+        return text
+
+    @staticmethod
+    def loads(text, **kwargs):
+        return json.loads(text, **kwargs)
+
+
+def _labels(**labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels.items()) + '}'
+
+
+def _histogram_lines(name, histogram, **labels):
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.bounds, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{_labels(**labels, le=bound)} {cumulative}')
+    cumulative += histogram.counts[-1]
+    lines.append(f'{name}_bucket{_labels(**labels, le="+Inf")} {cumulative}')
+    lines.append(f'{name}_sum{_labels(**labels)} {histogram.total}')
+    lines.append(f'{name}_count{_labels(**labels)} {cumulative}')
+    return lines
+
+
+def render(gauges, extra_counters=None):
+    lines = [
+        '# HELP cranium_handler_duration_seconds Time spent in each Socket.IO event handler.',
+        '# TYPE cranium_handler_duration_seconds histogram',
+    ]
+    for event, histogram in sorted(handler_latency.items()):
+        lines.extend(_histogram_lines('cranium_handler_duration_seconds', histogram, event=event))
+
+    lines.append('# HELP cranium_mailbox_wait_seconds Time game events spent queued in their game\'s mailbox.')
+    lines.append('# TYPE cranium_mailbox_wait_seconds histogram')
+    lines.extend(_histogram_lines('cranium_mailbox_wait_seconds', mailbox_wait))
+
+    lines.append('# HELP cranium_emits_total Socket.IO event packets encoded for sending, by event.')
+    lines.append('# TYPE cranium_emits_total counter')
+    for event, (count, _) in sorted(emitted.items()):
+        lines.append(f'cranium_emits_total{_labels(event=event)} {count}')
+    lines.append('# HELP cranium_emit_bytes_total Encoded bytes of Socket.IO event packets, by event.')
+    lines.append('# TYPE cranium_emit_bytes_total counter')
+    for event, (_, size) in sorted(emitted.items()):
+        lines.append(f'cranium_emit_bytes_total{_labels(event=event)} {size}')
+
+    lines.append('# HELP cranium_events_dropped_total Events dropped by a rate limit, by event and bucket scope.')
+    lines.append('# TYPE cranium_events_dropped_total counter')
+    for (event, scope), count in sorted(dropped.items()):
+        lines.append(f'cranium_events_dropped_total{_labels(event=event, scope=scope)} {count}')
+
+    lines.append('# HELP cranium_admission_rejected_total Connections, games and joins turned away by admission control, by reason.')
+    lines.append('# TYPE cranium_admission_rejected_total counter')
+    for (event, reason), count in sorted(rejected.items()):
+        lines.append(f'cranium_admission_rejected_total{_labels(event=event, reason=reason)} {count}')
+
+    for name, value in sorted({**counters, **(extra_counters or {})}.items()):
+        lines.append(f'# TYPE cranium_{name}_total counter')
+        lines.append(f'cranium_{name}_total {value}')
+
+    for name, (help_text, value) in gauges.items():
+        lines.append(f'# HELP cranium_{name} {help_text}')
+        lines.append(f'# TYPE cranium_{name} gauge')
+        lines.append(f'cranium_{name} {value}')
+
+    lines.append('# TYPE cranium_uptime_seconds gauge')
+    lines.append(f'cranium_uptime_seconds {time.time() - started_at}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,24 @@
+import _thread
+import time
+
+try:
+    from gevent import monkey
+except ImportError:
+    monkey = None
+
+# Some background work has to run on a real OS thread even when gevent has
+# monkey-patched threading: the profiler needs to interrupt whichever greenlet
+# is on the CPU, and the event log must not stall the hub while it fsyncs.
+
+GREEN = monkey is not None and monkey.is_module_patched('threading')
+
+if GREEN:
+    start_thread = monkey.get_original('_thread', 'start_new_thread')
+    get_ident = monkey.get_original('_thread', 'get_ident')
+    allocate_lock = monkey.get_original('_thread', 'allocate_lock')
+    sleep = monkey.get_original('time', 'sleep')
+else:
+    start_thread = _thread.start_new_thread
+    get_ident = _thread.get_ident
+    allocate_lock = _thread.allocate_lock
+    sleep = time.sleep
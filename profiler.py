@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+from collections import Counter
+
+import native
+
+IDLE_LEAVES = {'wait', 'select', 'poll', 'epoll', 'sleep', 'accept', 'recv', 'recv_into',
+               'readinto', 'readline', 'run', 'switch', '_wait', 'get', 'acquire', 'acquire_with_timeout'}
+BREAKDOWN = ('get_game_state', 'json', 'emit', 'other')
+
+_running = [False]
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+def _frame_label(code):
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+def _category(code):
+    if code.co_name == 'get_game_state':
+        return 'get_game_state'
+    if os.sep + 'json' + os.sep in code.co_filename or code.co_name in ('dumps', 'loads'):
+        return 'json'
+    if code.co_name in ('emit', '_send_packet', '_send_eio_packet'):
+        return 'emit'
+    return None
+
+
+def _sample(skip, stacks, handlers):
+    for ident, frame in sys._current_frames().items():
+        if ident in skip:
+            continue
+        codes = []
+        while frame is not None:
+            codes.append(frame.f_code)
+            frame = frame.f_back
+        codes.reverse()
+        if codes[-1].co_name in IDLE_LEAVES:
+            continue
+        stacks[';'.join(_frame_label(code) for code in codes)] += 1
+
+        handler_index = next((i for i, code in enumerate(codes) if code.co_name.startswith('handle_')), None)
+        if handler_index is None:
+            continue
+        found = {_category(code) for code in codes[handler_index + 1:]}
+        category = next((c for c in BREAKDOWN[:-1] if c in found), 'other')
+        breakdown = handlers.setdefault(codes[handler_index].co_name, dict.fromkeys(('samples',) + BREAKDOWN, 0))
+        breakdown['samples'] += 1
+        breakdown[category] += 1
+
+
+def profile(seconds, interval=0.005):
+    if _running[0]:
+        raise ProfilerBusy()
+    _running[0] = True
+
+    stacks = Counter()
+    handlers = {}
+    result = {}
+    # Under threading mode the caller sits in its own thread waiting for the
+    # result; under gevent it shares the hub thread with every handler.
+    caller = () if native.GREEN else (native.get_ident(),)
+
+    def sampler():
+        skip = {native.get_ident(), *caller}
+        samples = 0
+        deadline = time.monotonic() + seconds
+        try:
+            while time.monotonic() < deadline:
+                _sample(skip, stacks, handlers)
+                samples += 1
+                native.sleep(interval)
+        finally:
+            result['samples'] = samples
+            _running[0] = False
+
+    native.start_thread(sampler, ())
+    # Plain time.sleep yields to other greenlets under gevent and parks this
+    # request's thread under threading mode; either way the game keeps running.
+    while _running[0]:
+        time.sleep(0.05)
+
+    return {
+        'seconds': seconds,
+        'interval': interval,
+        'samples': result.get('samples', 0),
+        'collapsed': '\n'.join(f'{stack} {count}' for stack, count in stacks.most_common()),
+        'handlers': handlers,
+    }
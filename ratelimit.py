@@ -0,0 +1,96 @@
+import json
+import time
+
+import metrics
+
+# Each limited event has an optional (rate, burst) for the socket and for the
+# client IP. A bucket starts full at burst tokens, refills at rate tokens per
+# second and an event is only let through if it can take a whole token from
+# both. Like metrics, nothing here takes a lock; a race under threading mode can
+# at worst let one extra event through.
+
+SCOPES = ('sid', 'ip')
+
+
+class TokenBucket:
+    __slots__ = ('tokens', 'updated')
+
+    def __init__(self, burst, now):
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, rate, burst, now):
+        tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if tokens < 1:
+            self.tokens = tokens
+            return False
+        self.tokens = tokens - 1
+        return True
+
+    def full(self, rate, burst, now):
+        return self.tokens + (now - self.updated) * rate >= burst
+
+
+class RateLimiter:
+    # Buckets are created on an event's first use, so sockets that never send
+    # it cost nothing. A full bucket behaves exactly like a missing one, so a
+    # sweep may drop any bucket that has refilled; that is how IP buckets go
+    # away, since an IP may still have other sockets when one disconnects.
+
+    def __init__(self, limits):
+        self.limits = limits
+        self.buckets = {scope: {} for scope in SCOPES}
+
+    def allow(self, event, sid, ip, now=None):
+        limit = self.limits.get(event)
+        if limit is None:
+            return True
+        now = now or time.monotonic()
+        for scope, key in zip(SCOPES, (sid, ip)):
+            rate_burst = limit.get(scope)
+            if rate_burst is None:
+                continue
+            rate, burst = rate_burst
+            owned = self.buckets[scope].get(key)
+            if owned is None:
+                owned = self.buckets[scope].setdefault(key, {})
+            bucket = owned.get(event)
+            if bucket is None:
+                bucket = owned[event] = TokenBucket(burst, now)
+            if not bucket.take(rate, burst, now):
+                metrics.record_drop(event, scope)
+                return False
+        return True
+
+    def disconnect(self, sid):
+        self.buckets['sid'].pop(sid, None)
+
+    def sweep(self, now=None):
+        now = now or time.monotonic()
+        removed = 0
+        for scope, owners in self.buckets.items():
+            for key, owned in list(owners.items()):
+                if all(bucket.full(*self.limits[event][scope], now) for event, bucket in list(owned.items())):
+                    owners.pop(key, None)
+                    removed += 1
+        return removed
+
+    def __len__(self):
+        return sum(len(owners) for owners in self.buckets.values())
+
+
+def parse_limits(defaults, override):
+    # override is CRANIUM_RATE_LIMITS: 'off', or a JSON object such as
+    # {"correct_guess": {"sid": [2, 4]}, "sync_state": null}. Each scope given
+    # replaces that event's default; null turns a scope or a whole event off.
+    if override.strip().lower() == 'off':
+        return {}
+    limits = {event: dict(scopes) for event, scopes in defaults.items()}
+    for event, scopes in (json.loads(override) if override.strip() else {}).items():
+        if scopes is None:
+            limits.pop(event, None)
+            continue
+        limits.setdefault(event, {}).update(scopes)
+    return {event: {scope: tuple(value) for scope, value in scopes.items() if value is not None}
+            for event, scopes in limits.items()}
@@ -0,0 +1,774 @@
+let basePath = window.location.pathname;
+if (basePath.includes('/game/')) {
+    basePath = basePath.split('/game/')[0];
+}
+basePath = basePath.replace(/\/$/, '');
+const socketPath = basePath + '/socket.io';
+// ?wire=msgpack (remembered in localStorage) asks the server for MessagePack
+// payloads. A server without it keeps sending JSON, which on() handles too.
+const wireParam = new URLSearchParams(window.location.search).get('wire');
+if (wireParam) {
+    localStorage.setItem('cranium_wire', wireParam);
+}
+const socket = io({path: socketPath, auth: {wire: localStorage.getItem('cranium_wire') || 'json'}});
+let wireKeys = [];
+
+function decodeMsgpack(buffer) {
+    const bytes = new Uint8Array(buffer);
+    const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+    const utf8 = new TextDecoder();
+    let pos = 0;
+
+    function advance(size) {
+        pos += size;
+        return pos - size;
+    }
+    function str(length) {
+        return utf8.decode(bytes.subarray(pos, advance(length) + length));
+    }
+    function array(length) {
+        const items = [];
+        for (let i = 0; i < length; i++) items.push(read());
+        return items;
+    }
+    function map(length) {
+        const object = {};
+        for (let i = 0; i < length; i++) {
+            const key = read();
+            object[typeof key === 'number' ? wireKeys[key] : key] = read();
+        }
+        return object;
+    }
+    function read() {
+        const type = bytes[advance(1)];
+        if (type < 0x80) return type;
+        if (type < 0x90) return map(type & 0x0f);
+        if (type < 0xa0) return array(type & 0x0f);
+        if (type < 0xc0) return str(type & 0x1f);
+        if (type >= 0xe0) return type - 0x100;
+        switch (type) {
+            case 0xc0: return null;
+            case 0xc2: return false;
+            case 0xc3: return true;
+            case 0xca: return view.getFloat32(advance(4));
+            case 0xcb: return view.getFloat64(advance(8));
+            case 0xcc: return view.getUint8(advance(1));
+            case 0xcd: return view.getUint16(advance(2));
+            case 0xce: return view.getUint32(advance(4));
+            case 0xcf: return Number(view.getBigUint64(advance(8)));
+            case 0xd0: return view.getInt8(advance(1));
+            case 0xd1: return view.getInt16(advance(2));
+            case 0xd2: return view.getInt32(advance(4));
+            case 0xd3: return Number(view.getBigInt64(advance(8)));
+            case 0xd9: return str(view.getUint8(advance(1)));
+            case 0xda: return str(view.getUint16(advance(2)));
+            case 0xdb: return str(view.getUint32(advance(4)));
+            case 0xdc: return array(view.getUint16(advance(2)));
+            case 0xdd: return array(view.getUint32(advance(4)));
+            case 0xde: return map(view.getUint16(advance(2)));
+            case 0xdf: return map(view.getUint32(advance(4)));
+        }
+        throw new Error('Unsupported MessagePack type 0x' + type.toString(16));
+    }
+    return read();
+}
+
+function on(event, handler) {
+    socket.on(event, (data) => handler(data instanceof ArrayBuffer ? decodeMsgpack(data) : data));
+}
+
+socket.on('wire', (data) => {
+    wireKeys = data.keys;
+});
+
+let currentGameId = null;
+let currentPlayerId = null;
+let isGuesser = false;
+let isSpectator = false;
+let serverEpoch = null;
+let timerInterval = null;
+
+function showScreen(screenId) {
+    document.querySelectorAll('.screen').forEach(s => s.classList.remove('active'));
+    document.getElementById(screenId).classList.add('active');
+}
+
+function toggleInstructions() {
+    const modal = document.getElementById('instructions-modal');
+    modal.classList.toggle('show');
+}
+
+function endRound() {
+    if (timerInterval) {
+        clearInterval(timerInterval);
+        timerInterval = null;
+    }
+    socket.emit('end_round', { game_id: currentGameId });
+}
+
+function leaveGame() {
+    localStorage.removeItem('cranium_game_id');
+    localStorage.removeItem('cranium_player_name');
+    currentGameId = null;
+    currentPlayerId = null;
+    isSpectator = false;
+    lastGuesserId = null;
+    if (timerInterval) {
+        clearInterval(timerInterval);
+        timerInterval = null;
+    }
+    let urlBase = window.location.pathname;
+    if (urlBase.includes('/game/')) {
+        urlBase = urlBase.split('/game/')[0];
+    }
+    urlBase = urlBase.replace(/\/$/, '');
+    const landingUrl = urlBase || '/';
+    history.pushState({}, '', landingUrl);
+    showScreen('landing-screen');
+}
+
+function showLanding() {
+    showScreen('landing-screen');
+}
+
+function showCreateGame() {
+    showScreen('create-game-screen');
+    socket.emit('create_game');
+}
+
+function showJoinGame() {
+    const path = window.location.pathname;
+    if (path.includes('/game/')) {
+        const gameCode = path.split('/game/')[1];
+        document.getElementById('join-game-code').value = gameCode;
+    }
+    showScreen('join-game-screen');
+}
+
+function copyShareLink() {
+    const urlElement = document.getElementById('share-link');
+    const originalUrl = urlElement.textContent;
+
+    navigator.clipboard.writeText(originalUrl);
+
+    urlElement.textContent = '✓ Copied to clipboard!';
+    setTimeout(() => {
+        urlElement.textContent = originalUrl;
+    }, 2000);
+}
+
+function joinAsCreator() {
+    const name = document.getElementById('creator-name').value.trim();
+    if (!name) {
+        showToast('Please enter your name', 'warning');
+        return;
+    }
+    socket.emit('join_game', {
+        game_id: currentGameId,
+        player_name: name
+    });
+}
+
+function joinGame() {
+    const gameCode = document.getElementById('join-game-code').value.trim();
+    const playerName = document.getElementById('join-player-name').value.trim();
+
+    if (!gameCode || !playerName) {
+        showToast('Please enter both game code and your name', 'warning');
+        return;
+    }
+
+    currentGameId = gameCode;
+    socket.emit('join_game', {
+        game_id: gameCode,
+        player_name: playerName
+    });
+}
+
+function watchGame() {
+    const gameCode = document.getElementById('join-game-code').value.trim();
+    if (!gameCode) {
+        showToast('Please enter a game code', 'warning');
+        return;
+    }
+
+    currentGameId = gameCode;
+    isSpectator = true;
+    socket.emit('watch_game', { game_id: gameCode });
+}
+
+function startRound() {
+    socket.emit('start_round', {
+        game_id: currentGameId,
+        player_id: currentPlayerId
+    });
+}
+
+function selectCategory(category) {
+    socket.emit('select_category', {
+        game_id: currentGameId,
+        category: category,
+        difficulty: document.getElementById('difficulty-select').value
+    });
+}
+
+function startTimer() {
+    socket.emit('start_timer', {
+        game_id: currentGameId
+    });
+}
+
+function correctGuess() {
+    socket.emit('correct_guess', {
+        game_id: currentGameId,
+        word_seq: currentGameState.word_seq
+    });
+}
+
+function skipWord() {
+    socket.emit('skip_word', {
+        game_id: currentGameId,
+        word_seq: currentGameState.word_seq
+    });
+}
+
+function updateTimer(timeRemaining) {
+    const seconds = Math.ceil(timeRemaining);
+    const timerElements = document.querySelectorAll('.timer');
+
+    timerElements.forEach(el => {
+        el.textContent = seconds;
+        el.classList.remove('warning', 'danger');
+        if (seconds <= 10) el.classList.add('danger');
+        else if (seconds <= 20) el.classList.add('warning');
+    });
+
+    if (timeRemaining <= 0 && timerInterval) {
+        clearInterval(timerInterval);
+        timerInterval = null;
+    }
+}
+
+function showFlash(message, type) {
+    const flash = document.createElement('div');
+    flash.className = `flash-message flash-${type}`;
+    flash.textContent = message;
+    document.body.appendChild(flash);
+
+    setTimeout(() => {
+        flash.remove();
+    }, 1200);
+}
+
+function showToast(message, type = 'error') {
+    const toast = document.createElement('div');
+    toast.className = `toast toast-${type}`;
+    toast.textContent = message;
+    document.body.appendChild(toast);
+
+    setTimeout(() => {
+        toast.remove();
+    }, 3000);
+}
+
+function copyGameUrl() {
+    const urlElement = document.getElementById('lobby-game-url');
+    const originalUrl = urlElement.textContent;
+
+    navigator.clipboard.writeText(originalUrl);
+
+    urlElement.textContent = '✓ Copied to clipboard!';
+    setTimeout(() => {
+        urlElement.textContent = originalUrl;
+    }, 2000);
+}
+
+function editPlayerName(playerId, currentName) {
+    const playersList = document.getElementById('lobby-players');
+    const items = playersList.querySelectorAll('.player-item');
+
+    items.forEach(item => {
+        const nameSpan = item.querySelector('.player-name-editable');
+        if (nameSpan) {
+            const nameText = nameSpan.textContent.replace(' ✏️', '').trim();
+            if (nameText === currentName) {
+                const player = currentGameState.players.find(p => p.player_id === playerId);
+                item.innerHTML = `
+                    <span style="display: flex; align-items: center; gap: 10px;">
+                        <input type="text" id="edit-name-input" value="${currentName}" onkeypress="if(event.key === 'Enter') savePlayerName('${playerId}')" style="padding: 8px; border-radius: 5px; border: none; font-size: 1em;">
+                        <button onclick="savePlayerName('${playerId}')" style="background: #10b981; color: white; border: none; padding: 8px 12px; border-radius: 5px; cursor: pointer; font-size: 1.2em;">✓</button>
+                    </span>
+                    <span>Score: ${player.score} | Skips: ${player.skips}</span>
+                `;
+                const input = document.getElementById('edit-name-input');
+                input.focus();
+                input.select();
+            }
+        }
+    });
+}
+
+function savePlayerName(playerId) {
+    const input = document.getElementById('edit-name-input');
+    const newName = input.value.trim();
+
+    if (newName) {
+        socket.emit('rename_player', {
+            game_id: currentGameId,
+            player_id: playerId,
+            new_name: newName
+        });
+    }
+}
+
+let currentGameState = null;
+let lastGuesserId = null;
+
+function applyDelta(data) {
+    if (!currentGameState || data.version <= currentGameState.version) {
+        return false;
+    }
+    // A room_update covers from_version..version; single events cover one.
+    if ((data.from_version || data.version) > currentGameState.version + 1) {
+        socket.emit('sync_state', { game_id: currentGameId });
+        return false;
+    }
+
+    for (const [key, value] of Object.entries(data.delta)) {
+        if (key !== 'players') {
+            currentGameState[key] = value;
+            continue;
+        }
+        for (const [playerId, fields] of Object.entries(value)) {
+            let player = currentGameState.players.find(p => p.player_id === playerId);
+            if (!player) {
+                player = { player_id: playerId };
+                currentGameState.players.push(player);
+            }
+            Object.assign(player, fields);
+        }
+    }
+    currentGameState.version = data.version;
+    return true;
+}
+
+function renderRoundScore() {
+    document.getElementById('guesser-score').textContent = currentGameState.round_score;
+    document.getElementById('hinter-score').textContent = currentGameState.round_score;
+    document.getElementById('guesser-skips').textContent = currentGameState.round_skips;
+    document.getElementById('hinter-skips').textContent = currentGameState.round_skips;
+}
+
+function renderLobby(gameState) {
+    currentGameState = gameState;
+    document.getElementById('lobby-game-code').textContent = gameState.game_id;
+    let urlBase = window.location.pathname;
+    if (urlBase.includes('/game/')) {
+        urlBase = urlBase.split('/game/')[0];
+    }
+    urlBase = urlBase.replace(/\/$/, '');
+    const gameUrl = `${window.location.origin}${urlBase}/game/${gameState.game_id}`;
+    document.getElementById('lobby-game-url').textContent = gameUrl;
+
+    const playersList = document.getElementById('lobby-players');
+    playersList.innerHTML = '';
+
+    const sortedPlayers = [...gameState.players].sort((a, b) => b.score - a.score);
+
+    sortedPlayers.forEach(player => {
+        const li = document.createElement('li');
+        li.className = 'player-item';
+        li.setAttribute('data-player-id', player.player_id);
+
+        if (player.player_id === lastGuesserId) {
+            li.classList.add('highlight');
+        }
+
+        const isCurrentPlayer = player.player_id === currentPlayerId;
+        const nameDisplay = isCurrentPlayer
+            ? `<span class="player-name-editable" onclick="editPlayerName('${player.player_id}', '${player.name}')">${player.name} ✏️</span>`
+            : `<span class="player-name">${player.name}${player.connected ? '' : ' (disconnected)'}</span>`;
+
+        li.innerHTML = `
+            ${nameDisplay}
+            <span>Score: ${player.score} | Skips: ${player.skips}</span>
+        `;
+        playersList.appendChild(li);
+    });
+
+    showScreen('lobby-screen');
+}
+
+function renderSpectator(summary) {
+    document.getElementById('spectator-game-code').textContent = summary.game_id;
+
+    let status = 'Waiting for the next round';
+    if (summary.state === 'category_selection') {
+        status = summary.current_category
+            ? `${summary.guesser_name} is up next: ${summary.current_category}`
+            : `${summary.guesser_name} is choosing a category...`;
+    } else if (summary.state === 'active_round') {
+        status = `${summary.guesser_name} is guessing: ${summary.current_category}`;
+    }
+    document.getElementById('spectator-status').textContent = status;
+
+    const inRound = summary.state === 'active_round';
+    const timer = document.getElementById('spectator-timer');
+    const score = document.getElementById('spectator-score');
+    timer.style.display = inRound ? 'block' : 'none';
+    score.style.display = inRound ? 'block' : 'none';
+    score.textContent = `Score: ${summary.round_score} | Skips: ${summary.round_skips}`;
+
+    // Updates arrive about once a second, so the countdown runs locally.
+    if (timerInterval) {
+        clearInterval(timerInterval);
+        timerInterval = null;
+    }
+    if (inRound && summary.time_remaining !== null) {
+        const startTime = Date.now();
+        updateTimer(summary.time_remaining);
+        timerInterval = setInterval(() => {
+            updateTimer(summary.time_remaining - (Date.now() - startTime) / 1000);
+        }, 100);
+    }
+
+    const topList = document.getElementById('spectator-top');
+    topList.innerHTML = '';
+    summary.top.forEach(([name, points]) => {
+        const li = document.createElement('li');
+        li.className = 'player-item';
+        const nameSpan = document.createElement('span');
+        nameSpan.className = 'player-name';
+        nameSpan.textContent = name;
+        const scoreSpan = document.createElement('span');
+        scoreSpan.textContent = `Score: ${points}`;
+        li.append(nameSpan, scoreSpan);
+        topList.appendChild(li);
+    });
+    document.getElementById('spectator-counts').textContent =
+        `${summary.players} players, ${summary.spectators} watching`;
+
+    showScreen('spectator-screen');
+}
+
+on('game_created', (data) => {
+    currentGameId = data.game_id;
+    let urlBase = window.location.pathname;
+    if (urlBase.includes('/game/')) {
+        urlBase = urlBase.split('/game/')[0];
+    }
+    urlBase = urlBase.replace(/\/$/, '');
+    const shareUrl = `${window.location.origin}${urlBase}/game/${data.game_id}`;
+
+    document.getElementById('game-code').textContent = data.game_id;
+    document.getElementById('share-link').textContent = shareUrl;
+    document.getElementById('game-code-display').style.display = 'block';
+});
+
+on('joined_game', (data) => {
+    isSpectator = false;
+    serverEpoch = data.epoch;
+    if (data.resumed) {
+        // The broadcasts missed while offline were replayed just before this and
+        // went through their usual handlers. A replayed timer_started restarts the
+        // countdown at 60, so set it from the server's clock.
+        currentPlayerId = data.player_id;
+        if (currentGameState.state === 'active_round' && data.time_remaining !== null) {
+            if (timerInterval) clearInterval(timerInterval);
+            const startTime = Date.now() - ((60 - data.time_remaining) * 1000);
+            timerInterval = setInterval(() => {
+                const elapsed = (Date.now() - startTime) / 1000;
+                updateTimer(60 - elapsed);
+            }, 100);
+        }
+        return;
+    }
+    currentGameState = data.game_state;
+    currentPlayerId = data.player_id;
+    currentGameId = data.game_state.game_id;
+    isGuesser = (data.game_state.current_guesser_id === currentPlayerId);
+
+    const player = data.game_state.players.find(p => p.player_id === currentPlayerId);
+    if (player) {
+        localStorage.setItem('cranium_game_id', currentGameId);
+        localStorage.setItem('cranium_player_name', player.name);
+    }
+
+    let urlBase = window.location.pathname;
+    if (urlBase.includes('/game/')) {
+        urlBase = urlBase.split('/game/')[0];
+    }
+    urlBase = urlBase.replace(/\/$/, '');
+    const gameUrl = `${urlBase}/game/${currentGameId}`;
+    if (window.location.pathname !== gameUrl) {
+        history.pushState({}, '', gameUrl);
+    }
+
+    if (data.game_state.state === 'active_round' && !isGuesser) {
+        document.getElementById('hinter-word').textContent = data.current_word || '';
+        document.getElementById('hinter-timer').textContent = Math.ceil(data.game_state.time_remaining || 60);
+        document.getElementById('hinter-score').textContent = data.game_state.round_score;
+        showScreen('active-round-hinter-screen');
+
+        if (timerInterval) clearInterval(timerInterval);
+        const startTime = Date.now() - ((60 - (data.game_state.time_remaining || 60)) * 1000);
+        timerInterval = setInterval(() => {
+            const elapsed = (Date.now() - startTime) / 1000;
+            updateTimer(60 - elapsed);
+        }, 100);
+    } else {
+        renderLobby(data.game_state);
+    }
+});
+
+on('game_state', (gameState) => {
+    currentGameState = gameState;
+    if (gameState.state === 'lobby') {
+        renderLobby(gameState);
+    } else if (gameState.state === 'active_round') {
+        renderRoundScore();
+    }
+});
+
+on('player_joined', (data) => {
+    if (applyDelta(data) && currentGameState.state === 'lobby') {
+        renderLobby(currentGameState);
+    }
+});
+
+on('player_left', (data) => {
+    if (applyDelta(data) && currentGameState.state === 'lobby') {
+        renderLobby(currentGameState);
+    }
+});
+
+on('player_renamed', (data) => {
+    if (!applyDelta(data)) return;
+
+    const player = currentGameState.players.find(p => p.player_id === data.player_id);
+    if (!player) return;
+
+    if (data.player_id === currentPlayerId) {
+        localStorage.setItem('cranium_player_name', player.name);
+    }
+
+    const listItem = document.querySelector(`[data-player-id="${data.player_id}"]`);
+    if (!listItem) return;
+
+    const isCurrentPlayer = data.player_id === currentPlayerId;
+    if (isCurrentPlayer) {
+        const nameDisplay = `<span class="player-name-editable" onclick="editPlayerName('${player.player_id}', '${player.name}')">${player.name} ✏️</span>`;
+        const scoreDisplay = `<span>Score: ${player.score} | Skips: ${player.skips}</span>`;
+        listItem.innerHTML = `${nameDisplay}${scoreDisplay}`;
+    } else {
+        const nameSpan = listItem.querySelector('.player-name');
+        if (nameSpan) {
+            nameSpan.textContent = `${player.name}${player.connected ? '' : ' (disconnected)'}`;
+        }
+    }
+});
+
+on('room_update', (data) => {
+    if (!applyDelta(data)) return;
+
+    const player = currentGameState.players.find(p => p.player_id === currentPlayerId);
+    if (player) {
+        localStorage.setItem('cranium_player_name', player.name);
+    }
+    if (currentGameState.state === 'lobby') {
+        renderLobby(currentGameState);
+    }
+});
+
+on('round_started', (data) => {
+    currentGameState = data.game_state;
+    lastGuesserId = null;
+    isGuesser = (data.game_state.current_guesser_id === currentPlayerId);
+
+    if (isGuesser) {
+        document.getElementById('category-message').textContent = 'Choose a category:';
+        const grid = document.getElementById('category-grid');
+        grid.innerHTML = '';
+
+        data.game_state.categories.forEach(cat => {
+            const btn = document.createElement('button');
+            btn.className = 'btn-primary';
+            btn.textContent = cat;
+            btn.onclick = () => selectCategory(cat);
+            grid.appendChild(btn);
+        });
+
+        document.getElementById('difficulty-select').value = data.game_state.difficulty || 'normal';
+        document.getElementById('difficulty-select').style.display = 'block';
+        document.getElementById('category-grid').style.display = 'grid';
+        document.getElementById('category-waiting').style.display = 'none';
+    } else {
+        document.getElementById('category-message').textContent = `${data.guesser_name} is choosing a category...`;
+        document.getElementById('difficulty-select').style.display = 'none';
+        document.getElementById('category-grid').style.display = 'none';
+        document.getElementById('category-waiting').style.display = 'block';
+    }
+
+    showScreen('category-selection-screen');
+});
+
+on('category_selected', (data) => {
+    currentGameState = data.game_state;
+    document.getElementById('ready-category').textContent = data.category;
+    const difficulty = data.game_state.difficulty;
+    document.getElementById('ready-difficulty').textContent = difficulty && difficulty !== 'normal' ? `(${difficulty} words)` : '';
+
+    if (isGuesser) {
+        document.getElementById('ready-message').textContent = "Click Start when you're ready!";
+        document.getElementById('start-button').style.display = 'block';
+        document.getElementById('ready-waiting').style.display = 'none';
+    } else {
+        document.getElementById('ready-message').textContent = 'Get ready to give hints!';
+        document.getElementById('start-button').style.display = 'none';
+        document.getElementById('ready-waiting').style.display = 'block';
+    }
+
+    showScreen('ready-screen');
+});
+
+on('timer_started', (data) => {
+    currentGameState = data.game_state;
+    if (isGuesser) {
+        document.getElementById('guesser-score').textContent = '0';
+        document.getElementById('guesser-skips').textContent = '0';
+        document.getElementById('guesser-timer').textContent = '60';
+        showScreen('active-round-guesser-screen');
+    } else {
+        document.getElementById('hinter-word').textContent = data.word;
+        document.getElementById('hinter-score').textContent = '0';
+        document.getElementById('hinter-skips').textContent = '0';
+        document.getElementById('hinter-timer').textContent = '60';
+        showScreen('active-round-hinter-screen');
+    }
+
+    if (timerInterval) clearInterval(timerInterval);
+    const startTime = Date.now();
+    timerInterval = setInterval(() => {
+        const elapsed = (Date.now() - startTime) / 1000;
+        updateTimer(60 - elapsed);
+    }, 100);
+});
+
+on('word_changed', (data) => {
+    if (data.action === 'correct') {
+        if (isGuesser) {
+            showFlash('✓ CORRECT!', 'correct');
+        }
+    } else if (data.action === 'skip') {
+        showFlash('SKIPPED', 'skip');
+    }
+
+    if (!isGuesser) {
+        document.getElementById('hinter-word').textContent = data.word;
+    }
+    if (applyDelta(data)) {
+        renderRoundScore();
+    }
+});
+
+on('spectator_update', (summary) => {
+    if (!isSpectator) return;
+
+    currentGameId = summary.game_id;
+    let urlBase = window.location.pathname;
+    if (urlBase.includes('/game/')) {
+        urlBase = urlBase.split('/game/')[0];
+    }
+    urlBase = urlBase.replace(/\/$/, '');
+    const watchUrl = `${urlBase}/game/${currentGameId}?watch=1`;
+    if (window.location.pathname + window.location.search !== watchUrl) {
+        history.pushState({}, '', watchUrl);
+    }
+    renderSpectator(summary);
+});
+
+on('round_ended', (data) => {
+    if (timerInterval) {
+        clearInterval(timerInterval);
+        timerInterval = null;
+    }
+    lastGuesserId = data.guesser_id;
+    if (applyDelta(data)) {
+        renderLobby(currentGameState);
+    }
+});
+
+socket.on('connect', () => {
+    if (isSpectator && currentGameId) {
+        socket.emit('watch_game', { game_id: currentGameId });
+        return;
+    }
+    // After a dropped connection or a server restart, rejoin the game we
+    // were in; the server matches us back up by name and, if it still has them,
+    // replays just the broadcasts after the version we last saw.
+    const savedPlayerName = localStorage.getItem('cranium_player_name');
+    if (currentGameId && currentPlayerId && savedPlayerName) {
+        const rejoin = {
+            game_id: currentGameId,
+            player_name: savedPlayerName
+        };
+        if (currentGameState && serverEpoch) {
+            rejoin.resume_from = currentGameState.version;
+            rejoin.epoch = serverEpoch;
+        }
+        socket.emit('join_game', rejoin);
+    }
+});
+
+socket.on('connect_error', (err) => {
+    // Transport errors are retried; an inactive socket was refused by the server.
+    if (!socket.active) {
+        showToast(err.message, 'error');
+    }
+});
+
+on('error', (data) => {
+    showToast(data.message, 'error');
+    if (data.message === 'Game not found') {
+        localStorage.removeItem('cranium_game_id');
+        localStorage.removeItem('cranium_player_name');
+        showScreen('landing-screen');
+    }
+});
+
+const path = window.location.pathname;
+if (path.includes('/game/')) {
+    const urlGameCode = path.split('/game/')[1];
+    const savedGameId = localStorage.getItem('cranium_game_id');
+    const savedPlayerName = localStorage.getItem('cranium_player_name');
+
+    if (new URLSearchParams(window.location.search).has('watch')) {
+        // ?watch=1 links, e.g. for a big audience, go straight to the spectator view.
+        document.getElementById('join-game-code').value = urlGameCode;
+        if (socket.connected) {
+            watchGame();
+        } else {
+            socket.once('connect', watchGame);
+        }
+    } else if (urlGameCode === savedGameId && savedPlayerName) {
+        const attemptRejoin = () => {
+            if (!currentGameId) {
+                currentGameId = urlGameCode;
+                socket.emit('join_game', {
+                    game_id: urlGameCode,
+                    player_name: savedPlayerName
+                });
+            }
+        };
+
+        if (socket.connected) {
+            attemptRejoin();
+        } else {
+            socket.on('connect', attemptRejoin);
+        }
+    } else {
+        showJoinGame();
+    }
+} else {
+    showScreen('landing-screen');
+}
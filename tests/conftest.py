@@ -0,0 +1,66 @@
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# app reads words.json and its CRANIUM_* settings when it is imported, so both
+# are pinned before the first test imports it. Persistence is off by default;
+# tests that need it point it at tmp_path.
+os.chdir(REPO_ROOT)
+sys.path.insert(0, REPO_ROOT)
+os.environ.update({
+    'CRANIUM_SNAPSHOT_PATH': '',
+    'CRANIUM_EVENT_LOG_DIR': '',
+    'CRANIUM_WORD_STATS_PATH': '',
+    'CRANIUM_RATE_LIMITS': 'off',
+})
+
+import app as cranium  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    # Every test starts from an empty server.
+    for state in (cranium.games, cranium.sid_index, cranium.mailboxes, cranium.pending_updates,
+                  cranium.spectated, cranium.snapshot_lines, cranium.binary_sids):
+        state.clear()
+    cranium.reap_queue.clear()
+    cranium.round_timers.clear()
+    cranium.game_codes = cranium.GameCodes()
+    cranium.snapshot_stats['unwritten'] = 0
+    cranium.event_log = None
+    yield cranium
+    if cranium.event_log is not None:
+        cranium.event_log.close()
+        cranium.event_log = None
+
+
+@pytest.fixture
+def connect(app):
+    clients = []
+
+    def connect():
+        client = app.socketio.test_client(app.app)
+        clients.append(client)
+        return client
+
+    yield connect
+    for client in clients:
+        if client.is_connected():
+            client.disconnect()
+
+
+def received(client, event):
+    return [packet['args'][0] for packet in client.get_received() if packet['name'] == event]
+
+
+def create_game(client):
+    client.emit('create_game')
+    return received(client, 'game_created')[0]['game_id']
+
+
+def join_game(client, game_id, name):
+    client.emit('join_game', {'game_id': game_id, 'player_name': name})
+    return received(client, 'joined_game')[0]['player_id']
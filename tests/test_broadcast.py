@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+import metrics
+from conftest import create_game, join_game, received
+
+
+def expected_state(app, game_id):
+    state = app.get_game_state(game_id)
+    return state, state.pop('time_remaining')
+
+
+def assert_state(app, game_id, sent):
+    state, time_remaining = expected_state(app, game_id)
+    sent = dict(sent)
+    sent_time = sent.pop('time_remaining')
+    if time_remaining is None:
+        assert sent_time is None
+    else:
+        assert sent_time == pytest.approx(time_remaining, abs=1)
+    assert sent == state
+
+
+def test_sent_state_matches_get_game_state(app, connect):
+    client = connect()
+    game_id = create_game(client)
+    player_id = join_game(client, game_id, 'guesser')
+    client.emit('start_round', {'game_id': game_id, 'player_id': player_id})
+    client.emit('select_category', {'game_id': game_id, 'category': 'Movies'})
+    client.emit('start_timer', {'game_id': game_id})
+    client.get_received()
+
+    client.emit('join_game', {'game_id': game_id, 'player_name': 'guesser'})
+    assert_state(app, game_id, received(client, 'joined_game')[0]['game_state'])
+    client.emit('sync_state', {'game_id': game_id})
+    assert_state(app, game_id, received(client, 'game_state')[0])
+
+    lobby = create_game(client)
+    join_game(connect(), lobby, 'host')
+    client.emit('sync_state', {'game_id': lobby})
+    sent = received(client, 'game_state')[0]
+    assert sent['time_remaining'] is None
+    assert_state(app, lobby, sent)
+
+
+def test_state_change_invalidates_cached_encoding(app, connect):
+    client = connect()
+    game_id = create_game(client)
+    join_game(client, game_id, 'Ann')
+    first = json.loads(app.game_state_json(game_id).text)
+
+    join_game(connect(), game_id, 'Bob')
+    second = json.loads(app.game_state_json(game_id).text)
+
+    assert [player['name'] for player in first['players']] == ['Ann']
+    assert [player['name'] for player in second['players']] == ['Ann', 'Bob']
+    assert second['version'] > first['version']
+    assert app.games[game_id].encoded_state[0] == app.games[game_id].version
+
+
+def test_raw_fragments_are_spliced_in_place():
+    fragments = [metrics.RawJSON('{"a":[1,2]}'), metrics.RawJSON('"x\\"y"'), metrics.RawJSON('null')]
+    text = metrics.MeteredJSON.dumps(['event', {'one': fragments[0], 'list': fragments[1:], 'text': 'raw-json'}])
+
+    assert json.loads(text) == ['event', {'one': {'a': [1, 2]}, 'list': ['x"y', None], 'text': 'raw-json'}]
+
+
+def test_unknown_objects_still_fail_to_encode():
+    with pytest.raises(TypeError):
+        metrics.MeteredJSON.dumps(['event', object()])
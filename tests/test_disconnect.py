@@ -0,0 +1,56 @@
+from conftest import create_game, join_game, received
+
+
+def test_disconnect_marks_player_left(app, connect):
+    host, other = connect(), connect()
+    game_id = create_game(host)
+    player_id = join_game(host, game_id, 'Ann')
+    join_game(other, game_id, 'Bob')
+    other.get_received()
+
+    host.disconnect()
+
+    assert not app.games[game_id].players[player_id].connected
+    assert all(entry[1] != player_id for entry in app.sid_index.values())
+    left = received(other, 'player_left')
+    assert left and left[0]['player_name'] == 'Ann'
+
+
+def test_old_socket_closing_keeps_rejoined_player(app, connect):
+    old, new = connect(), connect()
+    game_id = create_game(old)
+    player_id = join_game(old, game_id, 'Ann')
+
+    assert join_game(new, game_id, 'Ann') == player_id
+    old.disconnect()
+
+    player = app.games[game_id].players[player_id]
+    assert player.connected
+    assert list(app.sid_index.values()) == [(game_id, player_id)]
+
+
+def test_switching_games_releases_previous_player(app, connect):
+    client = connect()
+    first = create_game(client)
+    first_player = join_game(client, first, 'Ann')
+    second = create_game(client)
+    second_player = join_game(client, second, 'Ann')
+
+    assert not app.games[first].players[first_player].connected
+    assert app.games[second].players[second_player].connected
+    assert list(app.sid_index.values()) == [(second, second_player)]
+
+
+def test_reaper_evicts_abandoned_games_only(app, connect):
+    abandoned, active = connect(), connect()
+    abandoned_id = create_game(abandoned)
+    join_game(abandoned, abandoned_id, 'Ann')
+    active_id = create_game(active)
+    join_game(active, active_id, 'Bob')
+    abandoned.disconnect()
+
+    app.reap_idle_games(app.datetime.now() + app.timedelta(days=2))
+
+    assert abandoned_id not in app.games and abandoned_id not in app.mailboxes
+    assert active_id in app.games
+    assert [game_id for _, game_id in app.reap_queue] == [active_id]
@@ -0,0 +1,56 @@
+import os
+
+import eventlog
+
+
+def append_batches(log, batches, size=10):
+    for batch in range(batches):
+        for i in range(size):
+            log.append(['correct', 'a-b-c', f'word {batch}-{i}'])
+        log.flush()
+
+
+def test_records_round_trip_in_order(tmp_path):
+    log = eventlog.EventLog(str(tmp_path))
+    append_batches(log, 3)
+    log.close()
+
+    records = list(eventlog.read_records(str(tmp_path)))
+    assert [record[0] for record in records] == list(range(1, 31))
+    assert records[0] == [1, 'correct', 'a-b-c', 'word 0-0']
+
+
+def test_rotation_keeps_newest_segments(tmp_path):
+    log = eventlog.EventLog(str(tmp_path), max_bytes=1, keep_segments=2)
+    append_batches(log, 4)
+    log.close()
+
+    paths = eventlog.segment_paths(str(tmp_path))
+    assert [os.path.basename(path) for path in paths] == ['events-000000000021.log', 'events-000000000031.log']
+    assert log.stats['rotations'] == 3
+    assert [record[0] for record in eventlog.read_records(str(tmp_path))] == list(range(21, 41))
+
+
+def test_torn_final_line_is_ignored(tmp_path):
+    log = eventlog.EventLog(str(tmp_path))
+    append_batches(log, 1, size=3)
+    log.close()
+    with open(eventlog.segment_paths(str(tmp_path))[-1], 'a') as f:
+        f.write('[4,"correct","a-b')
+
+    assert [record[0] for record in eventlog.read_records(str(tmp_path))] == [1, 2, 3]
+
+
+def test_reopened_log_continues_sequence(tmp_path):
+    log = eventlog.EventLog(str(tmp_path))
+    append_batches(log, 1, size=5)
+    log.close()
+
+    log = eventlog.EventLog(str(tmp_path), last_seq=5)
+    assert log.append(['skip', 'a-b-c', 'next']) == 6
+    log.close()
+    assert [record[0] for record in eventlog.read_records(str(tmp_path))] == list(range(1, 7))
+
+
+def test_missing_directory_reads_nothing(tmp_path):
+    assert list(eventlog.read_records(str(tmp_path / 'missing'))) == []
@@ -0,0 +1,49 @@
+import pytest
+
+
+def test_codes_are_unique_until_exhausted(app):
+    codes = app.GameCodes()
+    size = len(codes)
+    allocated = {codes.allocate() for _ in range(size)}
+
+    assert len(allocated) == size
+    assert len(codes) == 0
+    with pytest.raises(app.GameCodesExhausted):
+        codes.allocate()
+
+
+def test_code_and_number_round_trip(app):
+    codes = app.GameCodes()
+    for n in (0, 1, len(codes) // 2, len(codes) - 1):
+        assert codes.number(codes.code(n)) == n
+    assert codes.number('not-a-code') is None
+    assert codes.number('too-few') is None
+
+
+def test_release_and_reserve(app):
+    codes = app.GameCodes()
+    size = len(codes)
+    code = codes.allocate()
+    n = codes.number(code)
+    assert not codes.is_free(n)
+
+    codes.release(code)
+    codes.release(code)
+    assert codes.is_free(n) and len(codes) == size
+
+    codes.reserve(code)
+    codes.reserve(code)
+    assert not codes.is_free(n) and len(codes) == size - 1
+    assert code not in {codes.allocate() for _ in range(size - 1)}
+
+
+def test_evicted_game_frees_its_code(app, connect):
+    client = connect()
+    client.emit('create_game')
+    game_id = client.get_received()[0]['args'][0]['game_id']
+    assert not app.game_codes.is_free(app.game_codes.number(game_id))
+
+    client.disconnect()
+    app.reap_idle_games(app.datetime.now() + app.timedelta(days=2))
+    assert game_id not in app.games
+    assert app.game_codes.is_free(app.game_codes.number(game_id))
@@ -0,0 +1,54 @@
+from conftest import create_game, join_game
+
+
+def test_events_queued_while_locked_drain_in_order(app, connect):
+    client = connect()
+    game_id = create_game(client)
+    mailbox = app.mailboxes[game_id]
+    ran = []
+
+    mailbox.lock.acquire()
+    for i in range(5):
+        app.dispatch(game_id, ran.append, i)
+    assert ran == [] and len(mailbox.queue) == 5
+    mailbox.lock.release()
+
+    app.dispatch(game_id, ran.append, 5)
+    assert ran == [0, 1, 2, 3, 4, 5]
+    assert not mailbox.queue
+
+
+def test_failing_handler_does_not_stop_the_drain(app, connect):
+    client = connect()
+    game_id = create_game(client)
+    ran = []
+
+    app.mailboxes[game_id].lock.acquire()
+    app.dispatch(game_id, ran.append, 1)
+    app.dispatch(game_id, lambda: 1 / 0)
+    app.mailboxes[game_id].lock.release()
+    app.dispatch(game_id, ran.append, 2)
+
+    assert ran == [1, 2]
+
+
+def test_first_click_per_word_wins(app, connect):
+    guesser, hinter = connect(), connect()
+    game_id = create_game(guesser)
+    player_id = join_game(guesser, game_id, 'guesser')
+    join_game(hinter, game_id, 'hinter')
+    guesser.emit('start_round', {'game_id': game_id, 'player_id': player_id})
+    guesser.emit('select_category', {'game_id': game_id, 'category': 'Movies'})
+    guesser.emit('start_timer', {'game_id': game_id})
+    game = app.games[game_id]
+    word_seq = game.word_seq
+
+    app.mailboxes[game_id].lock.acquire()
+    for client in (guesser, hinter, hinter):
+        client.emit('correct_guess', {'game_id': game_id, 'word_seq': word_seq})
+    assert game.round_score == 0
+    app.mailboxes[game_id].lock.release()
+    guesser.emit('sync_state', {'game_id': game_id})
+
+    assert game.round_score == 1
+    assert game.word_seq == word_seq + 1
@@ -0,0 +1,149 @@
+import json
+
+from conftest import create_game, join_game
+
+
+def guess(app, client, game_id, event, times=1):
+    for _ in range(times):
+        client.emit(event, {'game_id': game_id, 'word_seq': app.games[game_id].word_seq})
+
+
+def play_round(app, client, game_id, player_id, correct=3, skips=1):
+    client.emit('start_round', {'game_id': game_id, 'player_id': player_id})
+    client.emit('select_category', {'game_id': game_id, 'category': 'Movies'})
+    client.emit('start_timer', {'game_id': game_id})
+    guess(app, client, game_id, 'correct_guess', correct)
+    guess(app, client, game_id, 'skip_word', skips)
+
+
+def restart(app, snapshot_path, log_dir):
+    # What a restart keeps: the snapshot file and the event log on disk.
+    if app.event_log is not None:
+        app.event_log.close()
+        app.event_log = None
+    app.games.clear()
+    app.mailboxes.clear()
+    app.snapshot_lines.clear()
+    restored = app.restore_snapshot(str(snapshot_path))
+    replayed, _ = app.replay_event_log(str(log_dir))
+    return restored, replayed
+
+
+def state_of(game):
+    return (game.state, game.current_guesser_id, game.current_category, game.current_word,
+            game.round_score, game.round_skips, game.used_words(), game.difficulty,
+            {pid: (p.name, p.score, p.skips) for pid, p in game.players.items()})
+
+
+def test_snapshot_round_trip(app, connect, tmp_path):
+    client = connect()
+    game_id = create_game(client)
+    player_id = join_game(client, game_id, 'guesser')
+    join_game(connect(), game_id, 'hinter')
+    play_round(app, client, game_id, player_id)
+    before = state_of(app.games[game_id])
+
+    app.write_snapshot(str(tmp_path / 'snapshot.jsonl'))
+    restored, replayed = restart(app, tmp_path / 'snapshot.jsonl', tmp_path / 'no-log')
+
+    assert (restored, replayed) == (1, 0)
+    assert state_of(app.games[game_id]) == before
+    assert all(not player.connected for player in app.games[game_id].players.values())
+
+
+def test_replay_applies_only_records_after_the_snapshot(app, connect, tmp_path):
+    app.event_log = app.eventlog.EventLog(str(tmp_path / 'log'))
+    client = connect()
+    game_id = create_game(client)
+    player_id = join_game(client, game_id, 'guesser')
+    play_round(app, client, game_id, player_id, correct=2, skips=0)
+    app.write_snapshot(str(tmp_path / 'snapshot.jsonl'))
+    guess(app, client, game_id, 'correct_guess', 3)
+    guess(app, client, game_id, 'skip_word')
+    before = state_of(app.games[game_id])
+    app.event_log.flush()
+
+    restart(app, tmp_path / 'snapshot.jsonl', tmp_path / 'log')
+
+    # Records already reflected in the snapshot are skipped, so no guess counts twice.
+    assert state_of(app.games[game_id]) == before
+    assert app.games[game_id].round_score == 5
+
+
+def test_event_log_alone_rebuilds_games(app, connect, tmp_path):
+    app.event_log = app.eventlog.EventLog(str(tmp_path / 'log'))
+    client = connect()
+    game_id = create_game(client)
+    player_id = join_game(client, game_id, 'guesser')
+    play_round(app, client, game_id, player_id)
+    client.emit('end_round', {'game_id': game_id})
+    before = state_of(app.games[game_id])
+    app.event_log.flush()
+
+    restored, _ = restart(app, tmp_path / 'missing.jsonl', tmp_path / 'log')
+
+    assert restored == 0
+    assert state_of(app.games[game_id]) == before
+
+
+def test_snapshot_encodes_games_inside_their_mailbox(app, connect, tmp_path):
+    client = connect()
+    game_id = create_game(client)
+    join_game(client, game_id, 'guesser')
+    path = str(tmp_path / 'snapshot.jsonl')
+
+    mailbox = app.mailboxes[game_id]
+    mailbox.lock.acquire()
+    app.write_snapshot(path)
+    assert game_id not in app.snapshot_lines
+    mailbox.lock.release()
+
+    app.write_snapshot(path)
+    assert game_id in app.snapshot_lines
+
+
+def test_unchanged_pass_writes_nothing(app, connect, tmp_path):
+    client = connect()
+    game_id = create_game(client)
+    join_game(client, game_id, 'guesser')
+    path = tmp_path / 'snapshot.jsonl'
+
+    app.write_snapshot(str(path))
+    path.unlink()
+    app.write_snapshot(str(path))
+    assert not path.exists()
+
+    app.games[game_id].version += 1
+    app.write_snapshot(str(path))
+    assert path.exists()
+
+
+def test_restore_skips_words_and_categories_missing_from_word_list(app, tmp_path):
+    kept = app.WORDS['Movies'][3]
+    lines = [
+        ['a-b-c', 'active_round', 'p1', 'Movies', 'Removed', 2, 1, 1.0, 60, ['Removed', kept], 5, 9,
+         [['p1', 'Ann', 0, 0]], 'hard'],
+        ['a-b-d', 'active_round', 'p1', 'Removed Category', 'w', 2, 1, 1.0, 60, ['w'], 5, 9, []],
+    ]
+    path = tmp_path / 'snapshot.jsonl'
+    path.write_text(json.dumps({'format': 2}) + '\n' + '\n'.join(json.dumps(line) for line in lines))
+
+    assert app.restore_snapshot(str(path)) == 2
+    assert app.games['a-b-c'].word is None
+    assert app.games['a-b-c'].used_words() == [kept]
+    assert app.games['a-b-d'].current_category is None
+
+
+def test_replay_skips_words_and_categories_missing_from_word_list(app):
+    records = [
+        [1, 'create', 'x'], [2, 'start_round', 'x', 'p'], [3, 'category', 'x', 'Removed'],
+        [4, 'timer', 'x', 1.0, 'w'], [5, 'correct', 'x', 'w2'], [6, 'category', 'x', 'Movies', 'easy'],
+        [7, 'skip', 'x', 'Removed'], [8, 'correct', 'x', app.WORDS['Movies'][0]],
+    ]
+    for record in records:
+        app.apply_record(record)
+
+    game = app.games['x']
+    assert (game.round_score, game.round_skips, game.difficulty) == (2, 1, 'easy')
+    assert game.current_word == app.WORDS['Movies'][0]
+    assert game.used_words() == [app.WORDS['Movies'][0]]
@@ -0,0 +1,56 @@
+import metrics
+import ratelimit
+
+LIMITS = {'correct_guess': {'sid': (2, 4), 'ip': (10, 6)}}
+
+
+def test_burst_then_refill():
+    limiter = ratelimit.RateLimiter(LIMITS)
+    assert [limiter.allow('correct_guess', 's1', 'ip', now=100.0) for _ in range(5)] == [True] * 4 + [False]
+    assert not limiter.allow('correct_guess', 's1', 'ip', now=100.25)
+    assert limiter.allow('correct_guess', 's1', 'ip', now=100.5)
+
+
+def test_ip_limit_spans_sockets():
+    limiter = ratelimit.RateLimiter(LIMITS)
+    allowed = [limiter.allow('correct_guess', sid, 'ip', now=100.0) for sid in ('s1', 's2') for _ in range(4)]
+    assert allowed == [True] * 6 + [False] * 2
+    assert limiter.allow('correct_guess', 's3', 'other ip', now=100.0)
+
+
+def test_unlimited_event_is_always_allowed():
+    limiter = ratelimit.RateLimiter(LIMITS)
+    assert all(limiter.allow('sync_state', 's1', 'ip', now=100.0) for _ in range(100))
+    assert len(limiter) == 0
+
+
+def test_drops_are_counted():
+    limiter = ratelimit.RateLimiter(LIMITS)
+    before = metrics.dropped.get(('correct_guess', 'sid'), 0)
+    for _ in range(6):
+        limiter.allow('correct_guess', 's1', 'ip', now=100.0)
+    assert metrics.dropped[('correct_guess', 'sid')] == before + 2
+
+
+def test_disconnect_and_sweep_drop_buckets():
+    limiter = ratelimit.RateLimiter(LIMITS)
+    for sid in ('s1', 's2'):
+        limiter.allow('correct_guess', sid, 'ip', now=100.0)
+    assert len(limiter) == 3
+
+    limiter.disconnect('s1')
+    assert len(limiter) == 2
+    assert limiter.sweep(now=100.0) == 0
+    assert limiter.sweep(now=101.0) == 2
+    assert len(limiter) == 0
+
+
+def test_parse_limits():
+    defaults = {'correct_guess': {'sid': [2, 4], 'ip': [10, 6]}, 'sync_state': {'sid': [1, 2]}}
+
+    assert ratelimit.parse_limits(defaults, '') == {
+        'correct_guess': {'sid': (2, 4), 'ip': (10, 6)}, 'sync_state': {'sid': (1, 2)}}
+    assert ratelimit.parse_limits(defaults, ' OFF ') == {}
+    assert ratelimit.parse_limits(defaults, '{"correct_guess": {"ip": null}, "sync_state": null, '
+                                            '"join_game": {"ip": [1, 3]}}') == {
+        'correct_guess': {'sid': (2, 4)}, 'join_game': {'ip': (1, 3)}}
@@ -0,0 +1,67 @@
+from conftest import create_game, join_game, received
+
+
+def start_game(connect):
+    # A guesser who will drop out and a hinter who stays and sees every broadcast.
+    guesser, hinter = connect(), connect()
+    game_id = create_game(guesser)
+    guesser.emit('join_game', {'game_id': game_id, 'player_name': 'guesser'})
+    joined = received(guesser, 'joined_game')[0]
+    join_game(hinter, game_id, 'hinter')
+    hinter.emit('start_round', {'game_id': game_id, 'player_id': joined['player_id']})
+    hinter.emit('select_category', {'game_id': game_id, 'category': 'Movies'})
+    hinter.emit('start_timer', {'game_id': game_id})
+    guesser.get_received()
+    hinter.get_received()
+    return game_id, joined['player_id'], hinter, guesser
+
+
+def miss_some_clicks(app, game_id, guesser, hinter, clicks):
+    seen = app.games[game_id].version
+    guesser.disconnect()
+    for _ in range(clicks):
+        hinter.emit('correct_guess', {'game_id': game_id, 'word_seq': app.games[game_id].word_seq})
+    return seen, [(packet['name'], packet['args'][0]) for packet in hinter.get_received()]
+
+
+def resume(connect, game_id, seen, epoch):
+    client = connect()
+    client.emit('join_game', {'game_id': game_id, 'player_name': 'guesser', 'resume_from': seen, 'epoch': epoch})
+    return [(packet['name'], packet['args'][0]) for packet in client.get_received()]
+
+
+def test_resume_replays_only_missed_broadcasts(app, connect):
+    game_id, player_id, hinter, guesser = start_game(connect)
+    seen, missed = miss_some_clicks(app, game_id, guesser, hinter, 3)
+
+    packets = resume(connect, game_id, seen, app.SERVER_EPOCH)
+
+    assert [name for name, _ in missed] == ['player_left'] + ['word_changed'] * 3
+    assert packets[:len(missed)] == missed
+    name, joined = packets[len(missed)]
+    assert name == 'joined_game'
+    assert joined['resumed'] and joined['player_id'] == player_id and 'game_state' not in joined
+
+
+def test_gap_older_than_buffer_gets_full_state(app, connect, monkeypatch):
+    monkeypatch.setattr(app, 'REPLAY_BUFFER', 4)
+    game_id, _, hinter, guesser = start_game(connect)
+    seen, _ = miss_some_clicks(app, game_id, guesser, hinter, 5)
+
+    packets = resume(connect, game_id, seen, app.SERVER_EPOCH)
+
+    name, joined = packets[0]
+    assert name == 'joined_game' and 'resumed' not in joined
+    assert joined['game_state']['version'] == app.games[game_id].version
+    assert joined['game_state']['round_score'] == 5
+
+
+def test_epoch_mismatch_gets_full_state(app, connect):
+    game_id, _, hinter, guesser = start_game(connect)
+    seen, _ = miss_some_clicks(app, game_id, guesser, hinter, 1)
+
+    packets = resume(connect, game_id, seen, 'previous-server')
+
+    name, joined = packets[0]
+    assert name == 'joined_game' and 'resumed' not in joined
+    assert joined['game_state']['round_score'] == 1
@@ -0,0 +1,39 @@
+from conftest import create_game, join_game
+
+
+def draw_words(app, game_id, count):
+    return [app.get_next_word(game_id) for _ in range(count)]
+
+
+def test_restored_round_does_not_repeat_words(app, connect, tmp_path):
+    client = connect()
+    game_id = create_game(client)
+    player_id = join_game(client, game_id, 'guesser')
+    client.emit('start_round', {'game_id': game_id, 'player_id': player_id})
+    client.emit('select_category', {'game_id': game_id, 'category': 'Movies'})
+    before = draw_words(app, game_id, 31)
+
+    path = str(tmp_path / 'snapshot.jsonl')
+    app.write_snapshot(path)
+    app.games.clear()
+    app.restore_snapshot(path)
+    after = draw_words(app, game_id, 20)
+
+    assert len(set(before + after)) == 51
+    assert len(app.games[game_id].used_words()) == 51
+
+
+def test_used_words_reset_once_category_is_exhausted(app):
+    game = app.Game('a-b-c')
+    game.current_category = 'Movies'
+    size = len(app.WORDS['Movies'])
+    for word in range(size - 1):
+        game.use_word(word)
+    # A repeat before the category runs out keeps the round's history.
+    game.use_word(0)
+    assert game.used_count == size - 1
+
+    game.use_word(size - 1)
+    game.use_word(1)
+    assert game.used_words() == [app.WORDS['Movies'][1]]
+    assert game.used_count == 1
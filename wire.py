@@ -0,0 +1,53 @@
+import json
+
+import metrics
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Connections that ask for it get every payload as one MessagePack binary
+# attachment instead of JSON text. Dict keys listed here go out as their index,
+# so a word_changed is a few bytes of field codes plus the word itself. The
+# table is sent to the client when the connection switches, and new keys must
+# only ever be appended.
+KEYS = (
+    'word', 'action', 'version', 'delta', 'round_score', 'round_skips', 'word_seq',
+    'players', 'player_id', 'player_name', 'name', 'score', 'skips', 'connected',
+    'state', 'time_remaining', 'from_version', 'game_state', 'game_id',
+    'current_guesser_id', 'current_category', 'categories', 'guesser_id', 'guesser_name',
+    'final_score', 'final_skips', 'category', 'current_word', 'message',
+    'epoch', 'resumed', 'difficulty',
+)
+KEY_CODES = {key: code for code, key in enumerate(KEYS)}
+
+
+def available():
+    return msgpack is not None
+
+
+def compact(value):
+    if type(value) is dict:
+        return {KEY_CODES.get(key, key): compact(item) for key, item in value.items()}
+    if type(value) is list:
+        return [compact(item) for item in value]
+    if type(value) is metrics.RawJSON:
+        return compact(json.loads(value.text))
+    return value
+
+
+def encode(payload):
+    return msgpack.packb(compact(payload), use_bin_type=True)
+
+
+def expand(value):
+    if type(value) is dict:
+        return {KEYS[key] if type(key) is int else key: expand(item) for key, item in value.items()}
+    if type(value) is list:
+        return [expand(item) for item in value]
+    return value
+
+
+def decode(data):
+    return expand(msgpack.unpackb(data, raw=False, strict_map_key=False))
@@ -0,0 +1,184 @@
+import json
+import os
+import random
+from array import array
+
+import native
+
+# Every correct guess and skip is folded into its word's counters as it
+# happens. The easy and hard modes draw from Vose alias tables built from those
+# counters, so a draw is O(1) whatever the size of the category. Building a
+# table is O(n), so like the event log's fsyncs it happens on a native thread
+# that cannot stall the hub, and only once a category has seen enough new
+# outcomes to move its weights.
+
+# A word with no history counts as one success at PRIOR_SECONDS and one skip,
+# so new words start in the middle and a single outcome cannot swing them far.
+PRIOR_SECONDS = 10.0
+MIN_EASE = 0.05
+REBUILD_MIN_OUTCOMES = 16
+REBUILD_FRACTION = 0.1
+DRAW_ATTEMPTS = 8
+STATS_FORMAT = 1
+
+
+def is_used(used, word):
+    # used is a round's bitmap of drawn words, bit word % 8 of byte word // 8,
+    # or None before the round's first word.
+    return used is not None and used[word >> 3] >> (word & 7) & 1
+
+
+class AliasTable:
+    __slots__ = ('prob', 'alias')
+
+    def __init__(self, weights):
+        size = len(weights)
+        total = sum(weights)
+        scaled = [weight * size / total for weight in weights]
+        self.prob = array('d', [1.0]) * size
+        self.alias = array('I', range(size))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Whatever is left over is 1 up to rounding and keeps its own column.
+
+    def draw(self):
+        # One random number picks the column and decides between it and its alias.
+        u = random.random() * len(self.prob)
+        column = int(u)
+        return column if u - column < self.prob[column] else self.alias[column]
+
+
+class CategoryStats:
+    __slots__ = ('correct', 'skips', 'seconds', 'pending')
+
+    def __init__(self, size):
+        self.correct = array('I', [0]) * size
+        self.skips = array('I', [0]) * size
+        self.seconds = array('d', [0.0]) * size
+        self.pending = 0
+
+    def ease(self, word):
+        # Chance of being guessed, scaled by how fast it usually is.
+        correct = self.correct[word]
+        success = (correct + 1) / (correct + self.skips[word] + 2)
+        mean_seconds = (self.seconds[word] + PRIOR_SECONDS) / (correct + 1)
+        return max(MIN_EASE, min(1.0, success * PRIOR_SECONDS / mean_seconds))
+
+
+class WordStats:
+    # Handlers only bump counters. A native thread wakes every interval seconds,
+    # rebuilds the tables of categories whose weights have drifted and, given a
+    # path, saves the counters if they changed.
+
+    def __init__(self, words, path=None, interval=30.0):
+        self.words = words
+        self.path = path
+        self.interval = interval
+        self.categories = {category: CategoryStats(len(category_words)) for category, category_words in words.items()}
+        self.tables = {}
+        self.rebuilds = 0
+        self.dirty = False
+        self.closed = False
+        self.lock = native.allocate_lock()
+        for category in self.categories:
+            self.rebuild(category)
+
+    def record(self, category, word, correct, seconds=0.0):
+        stats = self.categories[category]
+        if correct:
+            stats.correct[word] += 1
+            stats.seconds[word] += seconds
+        else:
+            stats.skips[word] += 1
+        stats.pending += 1
+        self.dirty = True
+
+    def rebuild(self, category):
+        stats = self.categories[category]
+        stats.pending = 0
+        eases = [stats.ease(word) for word in range(len(stats.correct))]
+        # Swapped in whole, so a draw on another greenlet sees the old or the new table.
+        self.tables[category] = {
+            'easy': AliasTable(eases),
+            'hard': AliasTable([1.0 / ease for ease in eases]),
+        }
+        self.rebuilds += 1
+
+    def rebuild_drifted(self):
+        rebuilt = 0
+        for category, stats in self.categories.items():
+            if stats.pending >= max(REBUILD_MIN_OUTCOMES, REBUILD_FRACTION * len(stats.correct)):
+                self.rebuild(category)
+                rebuilt += 1
+        return rebuilt
+
+    def draw(self, category, mode, used):
+        # Rejection keeps the round's used words out; None after DRAW_ATTEMPTS
+        # means the caller should fall back to its deck.
+        table = self.tables[category][mode]
+        for _ in range(DRAW_ATTEMPTS):
+            word = table.draw()
+            if not is_used(used, word):
+                return word
+        return None
+
+    def start(self):
+        native.start_thread(self._run, ())
+
+    def _run(self):
+        while not self.closed:
+            native.sleep(self.interval)
+            self.rebuild_drifted()
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            if self.path and self.dirty:
+                self.save(self.path)
+
+    def close(self):
+        self.closed = True
+        self.flush()
+
+    def save(self, path):
+        # Keyed by word text, so editing words.json never shifts a word's history.
+        data = {}
+        for category, stats in self.categories.items():
+            words = self.words[category]
+            data[category] = {words[i]: [stats.correct[i], stats.skips[i], round(stats.seconds[i], 2)]
+                              for i in range(len(words)) if stats.correct[i] or stats.skips[i]}
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'format': STATS_FORMAT, 'categories': data}, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self.dirty = False
+
+    def load(self, path=None):
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return 0
+        with open(path) as f:
+            data = json.load(f)
+        if data.get('format') != STATS_FORMAT:
+            return 0
+        loaded = 0
+        for category, counts in data['categories'].items():
+            stats = self.categories.get(category)
+            if stats is None:
+                continue
+            index = {word: i for i, word in enumerate(self.words[category])}
+            for word, (correct, skips, seconds) in counts.items():
+                i = index.get(word)
+                if i is not None:
+                    stats.correct[i], stats.skips[i], stats.seconds[i] = correct, skips, seconds
+                    loaded += 1
+            self.rebuild(category)
+        return loaded